@@ -0,0 +1,78 @@
+# JargonBot rerun time for long chats.
+#
+# Runs jarvisui.py under Streamlit's AppTest against a mock Ollama server.
+# Each run loads a synthetic history of --messages messages into session
+# state and times a plain rerun (median of --runs). "window" is the app as
+# it ships: only the newest RENDER_WINDOW messages are drawn. "all drawn"
+# widens the window past the whole history, so every message is still
+# emitted (from the HTML cache).
+#
+#     python benchmarks/chat_rerun.py --messages 1000 10000
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from message import load_messages  # noqa: E402
+from mock_ollama import MockOllama  # noqa: E402
+
+THINK = "reasoning step <x> " * 40
+
+
+def history(n: int):
+    rows = []
+    for i in range(n):
+        if i % 2 == 0:
+            rows.append({"seq": i, "role": "user", "content": f"question {i} about <tags> & stuff", "answer": f"question {i}"})
+        else:
+            answer = f"Quantum flux capacitor {i}"
+            rows.append({"seq": i, "role": "assistant", "content": f"<think>{THINK}</think>{answer}", "think": THINK, "answer": answer})
+    return load_messages(rows, keep_raw=8)
+
+
+def rerun_times(n: int, window, runs: int):
+    at = AppTest.from_file(str(ROOT / "jarvisui.py"), default_timeout=600)
+    at.run()
+    at.session_state["messages"] = history(n)
+    if window is not None:
+        at.session_state["render_window"] = window
+    at.run()  # fills the HTML cache
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    assert not at.exception
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--runs", type=int, default=4)
+    args = parser.parse_args()
+
+    server = MockOllama()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOSTS"] = server.url
+        os.environ["JARGONBOT_DB"] = str(Path(tmp) / "conversations.sqlite3")
+        os.environ["JARGONBOT_METRICS"] = str(Path(tmp) / "metrics")
+        print(f"{'messages':>9s} {'window':>8s} {'all drawn':>10s}")
+        for n in args.messages:
+            windowed = rerun_times(n, None, args.runs)
+            full = rerun_times(n, 10**9, args.runs)
+            print(f"{n:9,d} {windowed:7.2f}s {full:9.2f}s")
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# JargonBot cold start, phase by phase.
+#
+# Starts --runs fresh Python processes. Each one renders jarvisui.py once
+# under AppTest against a mock Ollama server. The script collects the
+# startup profile each process appends to startup.jsonl and prints the
+# median of every phase. A fresh process matters: imports are the
+# largest phases, and a warm interpreter would already have them cached.
+#
+#     python benchmarks/cold_start.py --runs 5
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def render_once():
+    sys.path.insert(0, str(ROOT / "tests"))
+    from streamlit.testing.v1 import AppTest
+
+    from mock_ollama import MockOllama
+
+    server = MockOllama()
+    os.environ["OLLAMA_HOSTS"] = server.url
+    at = AppTest.from_file(str(ROOT / "jarvisui.py"), default_timeout=60)
+    at.run()
+    assert not at.exception, at.exception
+    server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return render_once()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, JARGONBOT_METRICS=tmp, JARGONBOT_DB=str(Path(tmp) / "conversations.sqlite3"))
+        for _ in range(args.runs):
+            subprocess.run([sys.executable, __file__, "--child"], env=env, check=True, capture_output=True)
+        records = [json.loads(line) for line in (Path(tmp) / "startup.jsonl").read_text(encoding="utf-8").splitlines()]
+
+    phases = {key for rec in records for key in rec if key != "ts"}
+    medians = {key: statistics.median(rec.get(key, 0.0) for rec in records) for key in phases}
+    print(f"median of {len(records)} fresh processes")
+    for key, secs in sorted(medians.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {'total' if key == 'total_s' else key:28s} {secs * 1e3:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Append and page-load latency of the conversation store.
+#
+# Times ConversationStore.append() while the background writer batches the
+# rows. It then loads the newest page straight after the appends, which
+# includes flushing whatever the writer hasn't committed yet, and loads it
+# again with nothing queued (the usual case: a rerun appends two rows).
+#
+#     python benchmarks/conversation_store.py --rows 2000
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from conversation_store import ConversationStore  # noqa: E402
+
+REPLY = "<think>" + "reasoning " * 200 + "</think>Four word jargon answer"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--page", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app's batching settings; the writer drains rows while appends run
+        store = ConversationStore(Path(tmp) / "conversations.sqlite3")
+        store.append("bench", {"role": "user", "content": "warm up"})
+        store.flush()
+
+        start = time.perf_counter()
+        for i in range(args.rows):
+            if i % 2:
+                store.append("bench", {"role": "assistant", "content": REPLY, "answer": "Four word jargon answer"})
+            else:
+                store.append("bench", {"role": "user", "content": f"Question {i}"})
+        append = (time.perf_counter() - start) / args.rows
+
+        start = time.perf_counter()
+        page = store.load_recent("bench", args.page)
+        queued = time.perf_counter() - start
+        start = time.perf_counter()
+        store.load_recent("bench", args.page)
+        idle = time.perf_counter() - start
+
+    assert len(page) == args.page
+    print(f"append                                  {append * 1e6:7.1f} us")
+    print(f"{args.page}-message page right after {args.rows} appends  {queued * 1e3:7.2f} ms")
+    print(f"{args.page}-message page, nothing queued          {idle * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
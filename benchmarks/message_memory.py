@@ -0,0 +1,106 @@
+# Per-session memory of the chat history.
+#
+# Builds --turns synthetic turns with code-style think traces (2-3 KB
+# each). It measures with tracemalloc the old plain dicts (raw reply plus
+# separate think and answer copies), Message objects, and Message objects
+# compacted the way jarvisui does it, keeping the newest KEEP_RAW raw. It
+# also times reading a compressed think trace back.
+#
+#     python benchmarks/message_memory.py --turns 1000
+import argparse
+import hashlib
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from message import Message  # noqa: E402
+
+KEEP_RAW = 8  # jarvisui's KEEP_RAW_MESSAGES
+NAMES = ("node", "cache", "queue", "buffer", "index", "tensor", "shard", "router", "span", "token")
+ANSWER = "Quantum stateful sharded entanglement"
+
+
+def think_trace(rng: random.Random, i: int) -> str:
+    lines = [f"Let me implement a {rng.choice(NAMES)} {rng.choice(NAMES)} for request {i}."]
+    for j in range(rng.randint(25, 40)):
+        a, b = rng.sample(NAMES, 2)
+        lines.append(f"    def {a}_{b}_{j}(self, {a}, {b}={j}):\n        return self.{a}.get({b}) or {i * j}")
+    return "\n".join(lines)
+
+
+def make_turns(count: int):
+    rng = random.Random(1)
+    turns = []
+    for i in range(count):
+        think = think_trace(rng, i)
+        turns.append((f"Question {i}: write a {rng.choice(NAMES)} manager in Python", f"<think>\n{think}\n</think>\n\n{ANSWER}", think, ANSWER))
+    return turns
+
+
+def digest(d: dict) -> str:
+    raw = f"{d['content']}\0{d.get('answer', '')}\0{d.get('think', '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def build_dicts(turns):
+    messages = []
+    for i, turn in enumerate(turns):
+        # Fresh strings, as the parser hands the app new ones every turn
+        question, text, think, answer = (part.encode().decode() for part in turn)
+        user = {"role": "user", "content": question, "answer": question, "seq": 2 * i, "tokens": len(question) // 4}
+        reply = {"role": "assistant", "content": text, "think": think, "answer": answer, "seq": 2 * i + 1, "tokens": 9}
+        user["digest"], reply["digest"] = digest(user), digest(reply)
+        messages += [user, reply]
+    return messages
+
+
+def traced(build):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return kept, size
+
+
+def build_messages(turns, keep_raw=None):
+    # Only the Message objects stay alive; their dict inputs are dropped
+    messages = []
+    for d in build_dicts(turns):
+        messages.append(Message.from_dict(d))
+        if keep_raw is not None and len(messages) > keep_raw:
+            messages[-keep_raw - 1].compact()
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=1000)
+    args = parser.parse_args()
+
+    turns = make_turns(args.turns)
+    dicts, dict_size = traced(lambda: build_dicts(turns))
+    del dicts
+    _, plain_size = traced(lambda: build_messages(turns))
+    messages, compact_size = traced(lambda: build_messages(turns, KEEP_RAW))
+
+    print(f"{2 * args.turns} messages")
+    print(f"  dicts                          {dict_size / 1e6:5.2f} MB")
+    print(f"  Message, no compression        {plain_size / 1e6:5.2f} MB")
+    print(f"  Message, compressed (keep {KEEP_RAW})   {compact_size / 1e6:5.2f} MB")
+
+    old = messages[11]
+    assert old.compressed and old.think == turns[5][2]
+    runs = 2000
+    start = time.perf_counter()
+    for _ in range(runs):
+        old.think
+    print(f"compressed think read  {(time.perf_counter() - start) / runs * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Wall time of a multi-model comparison.
+#
+# Sends one prompt to --models models through fanout.fan_out against a mock
+# Ollama server that streams each reply with a fixed delay per chunk. It
+# compares running the models one after another with the concurrent
+# fan-out jarvisui uses. The mock serves requests in parallel, so this
+# measures the client side only; a real node's parallelism also depends on
+# OLLAMA_MAX_LOADED_MODELS and OLLAMA_NUM_PARALLEL.
+#
+#     python benchmarks/model_comparison.py --models 3
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+from fanout import fan_out, iter_events  # noqa: E402
+from mock_ollama import MockOllama  # noqa: E402
+from router import Router  # noqa: E402
+
+MODELS = ("gemma3:latest", "qwen3:4b", "llama3.2:3b", "mistral:7b", "phi4-mini")
+WORDS = ("Quantum ", "stateful ", "superposition ", "entanglement ", "matrix ", "flux.")
+
+
+def compare(models, router):
+    records = {}
+    start = time.perf_counter()
+    for model, _, record in iter_events(fan_out(models, [{"role": "user", "content": "hi"}], router=router), len(models)):
+        if record is not None:
+            records[model] = record
+    return time.perf_counter() - start, records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.02, help="seconds per streamed chunk")
+    args = parser.parse_args()
+
+    server = MockOllama(words=WORDS, delay=args.delay, models=MODELS)
+    router = Router([server.url])
+    models = list(MODELS[:args.models])
+    compare(models[:1], router)  # connection and event loop warm-up
+
+    one_wall, _ = compare(models[:1], router)
+    sequential = sum(compare([m], router)[0] for m in models)
+    wall, records = compare(models, router)
+    server.close()
+
+    print(f"one model            wall {one_wall:.2f} s")
+    print(f"{len(models)} models, in turn   wall {sequential:.2f} s")
+    print(f"{len(models)} models, fan-out   wall {wall:.2f} s")
+    for model, rec in records.items():
+        print(f"  {model:16s} total {rec['total_s']:.2f} s  TTFT {rec['ttft_s']} s")
+
+
+if __name__ == "__main__":
+    main()
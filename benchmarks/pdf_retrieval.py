@@ -0,0 +1,58 @@
+# BM25 retrieval over a large attached PDF.
+#
+# Builds a synthetic document of --pages pages with --words words each.
+# Word frequencies follow a Zipf-like curve, as in real text. The script
+# times the BM25Index build (chunking included) and the per-question
+# select() call that assembles the prompt context.
+#
+#     python benchmarks/pdf_retrieval.py --pages 1000
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from retrieval import BM25Index, chunk_pages  # noqa: E402
+
+# Same settings as jarvisui
+CHUNK_WORDS, CHUNK_OVERLAP, TOP_K, TOKEN_BUDGET = 220, 40, 4, 1200
+
+
+def make_pages(pages: int, words: int, vocab: int = 20000, seed: int = 0):
+    rng = random.Random(seed)
+    lexicon = [f"w{i}" for i in range(vocab)]
+    weights = [1 / (i + 1) for i in range(vocab)]
+    return [" ".join(rng.choices(lexicon, weights, k=words)) for _ in range(pages)], lexicon
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    pages, lexicon = make_pages(args.pages, args.words)
+    start = time.perf_counter()
+    index = BM25Index(chunk_pages(iter(pages), CHUNK_WORDS, CHUNK_OVERLAP))
+    build = time.perf_counter() - start
+    print(f"{args.pages} pages, {args.pages * args.words} words, {len(index)} chunks: index built in {build:.2f} s")
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.sample(lexicon[50:5000], 6)) for _ in range(args.queries)]
+    start = time.perf_counter()
+    for q in queries:
+        index.search(q, TOP_K)
+    search = (time.perf_counter() - start) / len(queries)
+    start = time.perf_counter()
+    for q in queries:
+        index.select(q, TOP_K, TOKEN_BUDGET)
+    select = (time.perf_counter() - start) / len(queries)
+    print(f"  search  {search * 1e3:.3f} ms/query")
+    print(f"  select  {select * 1e3:.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
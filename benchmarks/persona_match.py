@@ -0,0 +1,73 @@
+# Persona detection with a large persona directory.
+#
+# Writes --personas synthetic persona files (name plus two aliases each) to
+# a temporary directory. It times the cold PersonaRegistry build, then the
+# per-message detect() call for messages that mention a persona and for
+# messages that mention none.
+#
+#     python benchmarks/persona_match.py --personas 10000
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from persona_registry import PersonaRegistry  # noqa: E402
+
+SYLLABLES = ("ka", "ri", "to", "mel", "zan", "dor", "vi", "lu", "the", "qua", "nor", "bex")
+
+
+def persona_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def write_personas(directory: Path, count: int, rng: random.Random):
+    names = set()
+    while len(names) < count:
+        names.add(persona_name(rng))
+    names = sorted(names)
+    for i, name in enumerate(names):
+        data = {
+            "name": name,
+            "aliases": [f"{name} {persona_name(rng)}", f"captain {name}"],
+            "prompt": f"You are {name.title()}. " * 20,
+        }
+        (directory / f"persona_{i:05d}.json").write_text(json.dumps(data), encoding="utf-8")
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--personas", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        names = write_personas(Path(tmp), args.personas, rng)
+
+        start = time.perf_counter()
+        registry = PersonaRegistry(tmp, reload_interval=3600)
+        build = time.perf_counter() - start
+
+        filler = "could you explain how the quarterly numbers compare with last year please".split()
+        hits = [f"{' '.join(rng.sample(filler, 6))} like {rng.choice(names)} would" for _ in range(args.messages)]
+        misses = [" ".join(rng.sample(filler, 10)) for _ in range(args.messages)]
+        # Warm the regex before timing
+        registry.detect(hits[0])
+
+        print(f"{len(registry)} personas, cold index build {build:.2f} s")
+        for label, messages in (("mentions a persona", hits), ("mentions none", misses)):
+            start = time.perf_counter()
+            found = sum(registry.detect(m) is not None for m in messages)
+            per = (time.perf_counter() - start) / len(messages)
+            print(f"  {label:20s} {per * 1e6:7.1f} us/match  ({found}/{len(messages)} detected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Time to first token after a CharacterBot persona switch.
+#
+# Runs characterbot.py under AppTest against a stand-in Ollama server that
+# models prompt evaluation. The server has --slots KV slots. Each slot holds
+# the last token sequence it evaluated, and a request is charged
+# --per-token seconds for every token beyond the longest cached prefix, as
+# in Ollama's multi-slot prompt cache. The session switches personas a few
+# times and reads TTFT from the metrics log. The run is repeated with the
+# primer requests refused, so every new conversation sends the whole
+# persona prompt, as before prefix warming.
+#
+#     python benchmarks/persona_switch.py --idle 3
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+SESSION = ["Talk like Iron Man", "hi", "Now be Naruto", "Sherlock, any clues?", "Iron Man again", "Naruto again"]
+WORDS = ["Hello ", "there ", "friend."]
+
+
+def tokenize(text: str):
+    # Stand-in tokens: one per 4 characters
+    return [zlib.crc32(text[i:i + 4].encode()) for i in range(0, len(text), 4)]
+
+
+def common_prefix(a, b) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def start_node(per_token: float, num_slots: int, refuse_primers: bool):
+    slots = [[] for _ in range(num_slots)]
+    used = [0.0] * num_slots
+    runner = threading.Lock()  # one evaluation at a time, like a single runner
+
+    def evaluate(req):
+        words = WORDS[:req.get("options", {}).get("num_predict", len(WORDS))]
+        tokens = list(req.get("context") or []) + tokenize(req.get("prompt", ""))
+        with runner:
+            i = max(range(num_slots), key=lambda k: (common_prefix(slots[k], tokens), -used[k]))
+            reused = common_prefix(slots[i], tokens)
+            if reused < len(slots[i]):
+                # Don't truncate a slot that holds more; copy the shared
+                # prefix into the oldest other slot instead
+                i = min((k for k in range(num_slots) if k != i), key=lambda k: used[k], default=i)
+            time.sleep((len(tokens) - reused) * per_token)
+            context = tokens + [zlib.crc32(w.encode()) for w in words]
+            slots[i], used[i] = context, time.monotonic()
+        return words, {"done": True, "context": context, "prompt_eval_count": len(tokens) - reused, "eval_count": len(words)}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, obj, code=200):
+            body = json.dumps(obj).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path in ("/api/ps", "/api/tags"):
+                return self._json({"models": [{"name": "gemma3:latest", "model": "gemma3:latest"}]})
+            self._json({}, 404)
+
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            streamed = req.get("stream", True) is not False
+            if refuse_primers and not streamed:
+                return self._json({"error": "primer refused"}, 400)
+            words, final = evaluate(req)
+            final.update(model=req.get("model"), response="")
+            if not streamed:
+                final["response"] = "".join(words)
+                return self._json(final)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for obj in [{"model": req.get("model"), "response": w, "done": False} for w in words] + [final]:
+                body = (json.dumps(obj) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+                self.wfile.flush()
+                time.sleep(0.01)
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_session(args, refuse_primers: bool, messages=SESSION, idle: float = 0.0):
+    server = start_node(args.per_token, args.slots, refuse_primers)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOSTS"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ["JARGONBOT_DB"] = str(Path(tmp) / "conversations.sqlite3")
+        os.environ["JARGONBOT_METRICS"] = tmp
+        st.cache_resource.clear()
+        at = AppTest.from_file(str(ROOT / "characterbot.py"), default_timeout=60)
+        at.run()
+        time.sleep(idle)  # idle time after startup, for background warms
+        for message in messages:
+            at.chat_input[0].set_value(message).run()
+            assert not at.exception, at.exception
+        lines = (Path(tmp) / "generations.jsonl").read_text(encoding="utf-8").splitlines()
+    server.shutdown()
+    server.server_close()
+    return [json.loads(line) for line in lines[-len(messages):]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--per-token", type=float, default=0.01, help="seconds per evaluated prompt token")
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--idle", type=float, default=3.0, help="seconds between startup and the first message")
+    args = parser.parse_args()
+
+    # The first streamed reply in a process pays one-off import costs
+    run_session(args, True, SESSION[:1])
+    runs = {
+        "prefix warming": run_session(args, False, idle=args.idle),
+        "no warm prefixes": run_session(args, True, idle=args.idle),
+    }
+    for label, records in runs.items():
+        print(label)
+        for message, rec in zip(SESSION, records):
+            print(f"  {message:22s} TTFT {rec['ttft_s']:.3f} s  {rec.get('prefix'):9s} prompt_eval {rec['prompt_eval_count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Identical requests with and without the response cache.
+#
+# --sessions threads send the same chat request at once to a mock Ollama
+# server. They go straight to the server first, then through
+# ResponseCache.stream, where they share one upstream generation. The
+# script also times replaying a stored reply from memory and from a fresh
+# cache instance reading the disk tier.
+#
+#     python benchmarks/response_cache.py --sessions 8
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+import ollama  # noqa: E402
+
+from mock_ollama import MockOllama  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+MESSAGES = [{"role": "system", "content": "Answer in four words."}, {"role": "user", "content": "What is a qubit?"}]
+WORDS = ("Quantum ", "stateful ", "superposition ", "entanglement")
+
+
+def producer(client):
+    def produce(final):
+        for chunk in client.chat(model="gemma3", messages=MESSAGES, stream=True):
+            if chunk.done:
+                final["eval_count"] = chunk.eval_count
+            yield chunk.message.content or ""
+    return produce
+
+
+def burst(sessions: int, ask):
+    replies = []
+    threads = [threading.Thread(target=lambda: replies.append(ask())) for _ in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(replies)) == 1
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.04, help="seconds per streamed chunk")
+    args = parser.parse_args()
+
+    server = MockOllama(words=WORDS, delay=args.delay)
+    client = ollama.Client(server.url)
+    produce = producer(client)
+    key = ResponseCache.key("gemma3", MESSAGES)
+
+    wall = burst(args.sessions, lambda: "".join(produce({})))
+    print(f"{args.sessions} sessions, no cache   {wall:.2f} s  {len(server.posts('/api/chat'))} upstream calls")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(disk_dir=tmp)
+        before = len(server.posts("/api/chat"))
+        wall = burst(args.sessions, lambda: "".join(cache.stream(key, produce)))
+        print(f"{args.sessions} sessions, coalesced  {wall:.2f} s  {len(server.posts('/api/chat')) - before} upstream calls")
+
+        runs = 2000
+        start = time.perf_counter()
+        for _ in range(runs):
+            "".join(cache.stream(key, produce))
+        print(f"memory hit replay      {(time.perf_counter() - start) / runs * 1e3:.3f} ms")
+
+        start = time.perf_counter()
+        "".join(ResponseCache(disk_dir=tmp).stream(key, produce))
+        print(f"disk hit, new instance {(time.perf_counter() - start) * 1e3:.3f} ms")
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Request latency through the router when a node goes away.
+#
+# Two mock Ollama nodes sit behind one Router. The script sends
+# --requests sequential generate calls, stops the first node, and sends
+# --requests more. Each call's latency and serving node are printed.
+# Calls that land on the stopped node are retried on the other one after
+# the router's backoff, until its circuit opens and the node is skipped.
+# Last, a fresh router is started with the stopped node listed first; its
+# first call includes the blocking initial health check.
+#
+#     python benchmarks/router_failover.py --requests 8
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+import requests  # noqa: E402
+
+from mock_ollama import MockOllama  # noqa: E402
+from router import Router  # noqa: E402
+
+
+def generate(node):
+    response = requests.post(f"{node.url}/api/generate", json={"model": "gemma3", "prompt": "hi", "stream": False}, timeout=5)
+    response.raise_for_status()
+    return node.url
+
+
+def timed_calls(router, count: int, names):
+    for i in range(count):
+        start = time.perf_counter()
+        url = router.call("gemma3", generate)
+        print(f"  {i:2d}  {(time.perf_counter() - start) * 1e3:6.1f} ms  served by {names[url]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=8)
+    args = parser.parse_args()
+
+    nodes = [MockOllama(), MockOllama()]
+    names = {nodes[0].url: "node A", nodes[1].url: "node B"}
+    router = Router([n.url for n in nodes])
+
+    print("both nodes up")
+    timed_calls(router, args.requests, names)
+    nodes[0].close()
+    print("node A stopped")
+    timed_calls(router, args.requests, names)
+    for url, state, _, _ in router.status():
+        print(f"  {names[url]}: {state}")
+
+    print("fresh router, node A listed first")
+    timed_calls(Router([n.url for n in nodes]), 2, names)
+    nodes[1].close()
+
+
+if __name__ == "__main__":
+    main()
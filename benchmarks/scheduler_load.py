@@ -0,0 +1,128 @@
+# Load test for scheduler.Scheduler against a mock Ollama node.
+#
+# The mock streams TOKENS chunks per request. Every token takes a turn on
+# one shared "compute" lock, and it slows down as more requests run at
+# once (--thrash). This imitates a GPU that loses throughput when
+# oversubscribed. The script compares unlimited concurrency with the
+# scheduler's cap for a burst and for closed-loop sessions.
+#
+#     python benchmarks/scheduler_load.py --thrash 0.05
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ollama  # noqa: E402
+
+from scheduler import Scheduler  # noqa: E402
+
+TOKENS = 40
+TOKEN_COST = 0.004
+
+
+def start_node(thrash: float) -> str:
+    compute = threading.Lock()
+    active = [0]
+    active_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            with active_lock:
+                active[0] += 1
+            try:
+                for i in range(TOKENS + 1):
+                    if i < TOKENS:
+                        with compute:
+                            time.sleep(TOKEN_COST * (1 + thrash * (active[0] - 1)))
+                    chunk = {"model": "m", "created_at": "2024-01-01T00:00:00Z",
+                             "message": {"role": "assistant", "content": "w "}, "done": i == TOKENS}
+                    body = (json.dumps(chunk) + "\n").encode()
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                with active_lock:
+                    active[0] -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def one_request(client, scheduler, session_id, out):
+    started = time.perf_counter()
+    ttft = None
+
+    def generate():
+        nonlocal ttft
+        for _ in client.chat(model="m", messages=[{"role": "user", "content": "x"}], stream=True):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+
+    if scheduler:
+        with scheduler.slot(session_id, poll=0.05) as ticket:
+            if not ticket.cancelled:
+                generate()
+    else:
+        generate()
+    out.append((ttft, time.perf_counter() - started))
+
+
+def run(client, scheduler, sessions: int, per_session: int) -> str:
+    out = []
+
+    def session(i):
+        for _ in range(per_session):
+            one_request(client, scheduler, f"s{i}", out)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    total = sorted(o[1] for o in out)
+    ttft = sorted(o[0] for o in out)
+
+    def q(values, p):
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+    return (f"n={len(out)} wall={wall:.2f}s latency p50={q(total, 50):.2f}s p99={q(total, 99):.2f}s "
+            f"ttft p50={q(ttft, 50):.2f}s p99={q(ttft, 99):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler load test against a mock Ollama node")
+    parser.add_argument("--thrash", type=float, default=0.05, help="slowdown per extra concurrent request")
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--slots", type=int, default=2, help="scheduler max_concurrent")
+    args = parser.parse_args()
+
+    client = ollama.Client(start_node(args.thrash))
+    for per_session, label in ((1, "burst"), (3, "closed loop")):
+        print(f"thrash={args.thrash} {label} ({args.sessions} sessions x {per_session})")
+        print("  unlimited      ", run(client, None, args.sessions, per_session))
+        print(f"  scheduler({args.slots})   ", run(client, Scheduler(args.slots), args.sessions, per_session))
+
+
+if __name__ == "__main__":
+    main()
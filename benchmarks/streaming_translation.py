@@ -0,0 +1,78 @@
+# Translating an answer while it streams versus after it finishes.
+#
+# A mock stream produces --sentences sentences over --generate seconds,
+# word by word. A mock translation client takes --latency seconds per
+# call. "back to back" waits for the whole answer and then translates it
+# one sentence after another. "pipelined" feeds the stream through
+# StreamingTranslator on a pool of TRANSLATION_WORKERS threads, as
+# jarvisui does.
+#
+#     python benchmarks/streaming_translation.py --latency 0.2
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from translation import GoogleBackend, StreamingTranslator, TranslationCache, Translator  # noqa: E402
+
+TRANSLATION_WORKERS = 4
+
+
+def slow_client(latency: float):
+    class Client:
+        def __init__(self, source, target):
+            pass
+
+        def translate(self, text):
+            time.sleep(latency)
+            return text.upper()
+
+    return Client
+
+
+def stream(sentences: int, seconds: float):
+    words = [w + " " for i in range(sentences) for w in f"This is sentence number {i} of the answer.".split()]
+    for word in words:
+        time.sleep(seconds / len(words))
+        yield word
+
+
+def back_to_back(args, translator):
+    answer = "".join(stream(args.sentences, args.generate))
+    with ThreadPoolExecutor(1) as pool:
+        pipe = StreamingTranslator(translator, "fr", pool)
+        pipe.feed(answer)
+        return pipe.finish()
+
+
+def pipelined(args, translator):
+    with ThreadPoolExecutor(TRANSLATION_WORKERS) as pool:
+        pipe = StreamingTranslator(translator, "fr", pool)
+        for delta in stream(args.sentences, args.generate):
+            pipe.feed(delta)
+            pipe.preview()
+        return pipe.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=10)
+    parser.add_argument("--generate", type=float, default=1.2, help="seconds of generation")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per translation call")
+    args = parser.parse_args()
+
+    results = {}
+    for label, run in (("back to back", back_to_back), ("pipelined", pipelined)):
+        # A fresh cache each time, so nothing is served from memory
+        translator = Translator(GoogleBackend(client_factory=slow_client(args.latency)), TranslationCache())
+        start = time.perf_counter()
+        results[label] = run(args, translator)
+        print(f"{label:13s} {time.perf_counter() - start:5.2f} s")
+    assert results["back to back"] == results["pipelined"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Per-chunk parsing cost of a long streamed reply.
+#
+# Streams a synthetic reply of --tokens chunks (a long <think> trace, then a
+# short answer) through the live-update loop. It times the original loop,
+# which re-split the whole accumulated text on every chunk, against
+# ThinkStreamParser, which consumes each chunk once. The old loop grows
+# quadratically, so it is capped at --old-tokens.
+#
+#     python benchmarks/think_parser.py --tokens 50000
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from streaming import ThinkStreamParser  # noqa: E402
+from tests.test_parser_equivalence import extract_think_and_answer  # noqa: E402
+
+WORDS = ("state", "vector", "cache", "entropy", "kernel", "tensor", "latency", "flux", "graph", "node")
+
+
+def chunks(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    out = ["<th", "ink>\n"]
+    out += [rng.choice(WORDS) + rng.choice((" ", " ", ", ", ".\n")) for _ in range(count - 8)]
+    out += ["</think>", "\n\n", "Quantum ", "stateful ", "superposition ", "entanglement"]
+    return out
+
+
+def old_loop(deltas):
+    full_text = ""
+    for delta in deltas:
+        full_text += delta
+        think_live, ans_live = extract_think_and_answer(full_text)
+        shown = (think_live[-600:], ans_live)
+    return extract_think_and_answer(full_text), shown
+
+
+def new_loop(deltas):
+    parser = ThinkStreamParser()
+    for delta in deltas:
+        parser.feed(delta)
+        shown = (parser.think_tail, parser.answer)
+    return parser.result(), shown
+
+
+def timed(fn, deltas):
+    start = time.perf_counter()
+    result = fn(deltas)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=50000)
+    parser.add_argument("--old-tokens", type=int, default=20000)
+    args = parser.parse_args()
+
+    deltas = chunks(args.tokens)
+    new_s, new_result = timed(new_loop, deltas)
+    print(f"ThinkStreamParser  {args.tokens:6d} tokens  {new_s:6.2f} s")
+
+    old_deltas = chunks(args.old_tokens)
+    old_s, old_result = timed(old_loop, old_deltas)
+    # Both loops end on the same (think, answer) split
+    assert old_result[0] == new_loop(old_deltas)[0]
+    print(f"full-text re-split {args.old_tokens:6d} tokens  {old_s:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
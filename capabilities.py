@@ -0,0 +1,108 @@
+import importlib
+import importlib.util
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+# Optional features, each backed by one module. Availability is probed with
+# find_spec (no import) and the module is imported the first time a
+# feature is actually used, so a cold start doesn't pay for all of them.
+class Capabilities:
+    def __init__(self, profile=None, **modules):
+        self.modules = modules
+        self.profile = profile
+        self._available = {}
+
+    def available(self, feature: str) -> bool:
+        if feature not in self._available:
+            try:
+                spec = importlib.util.find_spec(self.modules[feature])
+            except (ImportError, ValueError):
+                spec = None
+            self._available[feature] = spec is not None
+        return self._available[feature]
+
+    def load(self, feature: str):
+        # The feature's module, or None when it can't be imported
+        if not self.available(feature):
+            return None
+        name = self.modules[feature]
+        if name in sys.modules:
+            return sys.modules[name]
+        try:
+            if self.profile is not None:
+                with self.profile.phase(f"import {name}"):
+                    return importlib.import_module(name)
+            return importlib.import_module(name)
+        except Exception:
+            # Installed but broken (e.g. missing system library)
+            self._available[feature] = False
+            return None
+
+    def __iter__(self):
+        return iter(self.modules)
+
+
+# Cold-start timings for one process. mark() records the time since the
+# previous mark under a name, but only the first time that name is seen,
+# so reruns don't overwrite the cold numbers. finish() ends the cold start:
+# the total is frozen and later marks are ignored.
+class StartupProfile:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.timings = {}
+        self.reported = False
+        self.total_s = None
+        self._last = self.started
+
+    def mark(self, name: str):
+        if self.reported:
+            return
+        now = self.clock()
+        if name not in self.timings:
+            self.timings[name] = now - self._last
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.timings.setdefault(name, self.clock() - start)
+
+    def preload(self, *modules):
+        # Imports one module at a time so the cost lands on the right
+        # component; later `from x import y` statements then hit sys.modules
+        if not self.reported:
+            self._last = self.clock()
+        for name in modules:
+            importlib.import_module(name)
+            self.mark(f"import {name}")
+
+    def total(self) -> float:
+        if self.total_s is not None:
+            return self.total_s
+        return self._last - self.started
+
+    def report(self):
+        return sorted(self.timings.items(), key=lambda item: item[1], reverse=True)
+
+    def finish(self, path=None) -> bool:
+        # First call ends the cold start; appends one JSON line to path
+        if self.reported:
+            return False
+        self.total_s = self.total()
+        self.reported = True
+        if path:
+            rec = {
+                "ts": time.time(),
+                "total_s": round(self.total(), 4),
+                **{name: round(secs, 4) for name, secs in self.timings.items()},
+            }
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+        return True
@@ -1,67 +1,194 @@
 import streamlit as st
 import requests
 import json
+import os
+import uuid
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+from conversation_store import ConversationStore
+from metrics import GenerationMetrics, MetricsSink
+from persona_registry import PersonaRegistry
+from prefix_cache import PrefixCache
+from router import NoHealthyEndpoint, Router
+from scheduler import BACKGROUND_SESSION, Scheduler
 
 # -----------------------
 # Configuration
 # -----------------------
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
+# Comma-separated Ollama nodes; each request goes to the least busy healthy
+# node that already has the model loaded
+OLLAMA_HOSTS = os.environ.get("OLLAMA_HOSTS", "http://localhost:11434").split(",")
 MODEL_NAME = "gemma3:latest"
 
-CHARACTER_PROMPTS = {
-    "iron man": """
-You are Iron Man (Tony Stark).
-Witty, sarcastic, genius, confident.
-Use clever humor and charismatic tone.
-""",
-    "naruto": """
-You are Naruto Uzumaki.
-Energetic, optimistic, loud, determined.
-Talk about becoming Hokage!
-""",
-    "sherlock": """
-You are Sherlock Holmes.
-Highly analytical, logical, observant.
-Speak intelligently and deduce things.
-"""
-}
+# Stream tokens into the chat bubble as they arrive; set False to use the
+# blocking request path instead.
+STREAM_RESPONSES = True
+
+# Reuse the `context` tokens Ollama returns so each turn only sends the new
+# user message; the full transcript is rebuilt when the context is missing.
+CONTINUATION_MODE = True
+
+# Used when no character has been picked yet
+DEFAULT_PROMPT = "You are a helpful AI assistant."
+
+# Each persona's prefix is evaluated once per model and its context reused
+# to start new conversations (needs CONTINUATION_MODE). At startup every
+# persona is warmed in the background when there are at most
+# PREWARM_PERSONAS of them; otherwise each one is warmed after its first
+# (cold) conversation starts. Warms use background scheduler slots.
+PREFIX_CACHE_SIZE = 32
+PREWARM_PERSONAS = 16
+
+# One JSON/YAML file per persona, with optional aliases; the index is
+# rebuilt automatically when files in this directory change.
+PERSONA_DIR = Path(__file__).parent / "personas"
+
+# Per-generation metrics: JSONL log + Prometheus text file in this directory,
+# and a /metrics endpoint when JARGONBOT_METRICS_PORT is set
+METRICS_DIR = os.environ.get("JARGONBOT_METRICS", str(Path.home() / ".jargonbot" / "metrics"))
+METRICS_PORT = os.environ.get("JARGONBOT_METRICS_PORT")
+
+# Chats are saved here and resumed via ?session=<id> in the URL; only the
+# newest HISTORY_PAGE messages are loaded up front
+CONVERSATION_DB = os.environ.get("JARGONBOT_DB", str(Path.home() / ".jargonbot" / "conversations.sqlite3"))
+HISTORY_PAGE = 50
+
+# Generations allowed to run at once in this process; the rest queue and
+# are served round-robin across sessions
+MAX_CONCURRENT_GENERATIONS = int(os.environ.get("JARGONBOT_MAX_CONCURRENT", "2"))
 
 # -----------------------
 # Helper Functions
 # -----------------------
 
+@st.cache_resource
+def get_registry():
+    return PersonaRegistry(PERSONA_DIR)
+
+
+@st.cache_resource
+def get_store():
+    return ConversationStore(CONVERSATION_DB)
+
+
+def save_message(msg):
+    msg["seq"] = get_store().append(st.session_state.session_id, msg)
+    st.session_state.messages.append(msg)
+
+
+def load_earlier():
+    page = get_store().load_before(
+        st.session_state.session_id, st.session_state.messages[0]["seq"], HISTORY_PAGE
+    )
+    st.session_state.messages = page + st.session_state.messages
+    st.session_state.has_earlier = len(page) == HISTORY_PAGE
+    st.session_state.context = None
+
+
+@st.cache_resource
+def get_router():
+    return Router([h.strip() for h in OLLAMA_HOSTS if h.strip()])
+
+
+@st.cache_resource
+def get_scheduler():
+    return Scheduler(MAX_CONCURRENT_GENERATIONS)
+
+
+@st.cache_resource
+def get_metrics_sink():
+    sink = MetricsSink(METRICS_DIR, "characterbot")
+    if METRICS_PORT:
+        sink.serve(int(METRICS_PORT))
+    return sink
+
+
 def detect_character(text):
-    text = text.lower()
-    for character in CHARACTER_PROMPTS:
-        if character in text:
-            return character
-    return None
+    return get_registry().detect(text)
 
 
-def generate_response(prompt):
-    try:
-        response = requests.post(
-            OLLAMA_URL,
-            json={
-                "model": MODEL_NAME,
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=60
-        )
+@st.cache_resource
+def get_session():
+    # One keep-alive connection pool shared by every Streamlit session
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def build_payload(prompt, stream, context=None):
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "stream": stream
+    }
+    if context:
+        payload["context"] = context
+    return payload
 
-        if response.status_code == 200:
-            return response.json()["response"]
-        else:
-            return "⚠️ Error: Could not get response from Gemma."
 
+def post_generate(node, payload):
+    response = get_session().post(f"{node.url}/api/generate", json=payload, timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+
+def open_stream(node, payload):
+    with get_session().post(
+        f"{node.url}/api/generate",
+        json=payload,
+        stream=True,
+        timeout=(5, 60)
+    ) as response:
+        response.raise_for_status()
+        # Ollama streams one JSON object per line
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def generate_response(prompt, context=None, done=None):
+    payload = build_payload(prompt, False, context)
+    try:
+        data = get_router().call(MODEL_NAME, lambda node: post_generate(node, payload))
+        if done is not None:
+            done.update(data)
+        return data["response"]
+
+    except NoHealthyEndpoint:
+        return "⚠️ No Ollama server is reachable right now. Start one using: ollama serve"
+    except requests.exceptions.HTTPError:
+        return "⚠️ Error: Could not get response from Gemma."
     except requests.exceptions.ConnectionError:
         return "⚠️ Ollama server not running. Start it using: ollama run gemma:3b"
     except Exception as e:
         return "⚠️ Unexpected error occurred."
 
 
+def stream_response(prompt, context=None, done=None):
+    payload = build_payload(prompt, True, context)
+    try:
+        for chunk in get_router().stream(MODEL_NAME, lambda node: open_stream(node, payload)):
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                if done is not None:
+                    done.update(chunk)
+                break
+
+    except NoHealthyEndpoint:
+        yield "⚠️ No Ollama server is reachable right now. Start one using: ollama serve"
+    except requests.exceptions.HTTPError:
+        yield "⚠️ Error: Could not get response from Gemma."
+    except requests.exceptions.ConnectionError:
+        yield "⚠️ Ollama server not running. Start it using: ollama run gemma:3b"
+    except Exception as e:
+        yield "⚠️ Unexpected error occurred."
+
+
 def build_prompt(character_prompt, messages):
     conversation = ""
     for msg in messages:
@@ -78,6 +205,43 @@ Assistant:
 """
 
 
+def build_turn_prompt(user_text):
+    # Only the new turn; persona and history already live in the context
+    return f"User: {user_text}\nAssistant:"
+
+
+def build_primer(character_prompt):
+    # Persona setup on its own, so its context can start any conversation
+    return f"""
+{character_prompt}
+
+Stay in character for the rest of this conversation. Reply with the single word: Ready.
+"""
+
+
+def warm_prefix(model, character_prompt):
+    payload = {
+        "model": model,
+        "prompt": build_primer(character_prompt),
+        "stream": False,
+        "options": {"num_predict": 4}
+    }
+    with get_scheduler().slot(BACKGROUND_SESSION, background=True):
+        data = get_router().call(model, lambda node: post_generate(node, payload))
+    return data.get("context")
+
+
+@st.cache_resource
+def get_prefix_cache():
+    cache = PrefixCache(warm_prefix, PREFIX_CACHE_SIZE)
+    registry = get_registry()
+    if CONTINUATION_MODE and len(registry) <= PREWARM_PERSONAS:
+        cache.prefetch(MODEL_NAME, DEFAULT_PROMPT)
+        for name in registry:
+            cache.prefetch(MODEL_NAME, registry.prompt(name))
+    return cache
+
+
 # -----------------------
 # Streamlit UI
 # -----------------------
@@ -88,12 +252,30 @@ st.title("🎭 Gemma 3 Character Chatbot")
 st.markdown("Mention a character like **Iron Man, Naruto, Sherlock** to switch personalities.")
 
 # Session State
+if "session_id" not in st.session_state:
+    # Resume the conversation named in the URL, or start a new one
+    session_id = st.query_params.get("session") or uuid.uuid4().hex
+    st.session_state.session_id = session_id
+    st.session_state.messages = get_store().load_recent(session_id, HISTORY_PAGE)
+    st.session_state.has_earlier = get_store().count(session_id) > len(st.session_state.messages)
+    st.session_state.current_character = get_store().get_meta(session_id).get("character")
+    st.query_params["session"] = session_id
+
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
 if "current_character" not in st.session_state:
     st.session_state.current_character = None
 
+if "context" not in st.session_state:
+    st.session_state.context = None
+
+if "last_metrics" not in st.session_state:
+    st.session_state.last_metrics = {}
+
+# Starts warming persona prefixes in the background on the first run
+get_prefix_cache()
+
 # Chat input
 user_input = st.chat_input("Type your message...")
 
@@ -101,25 +283,92 @@ if user_input:
 
     detected = detect_character(user_input)
 
-    if detected:
+    if detected and detected != st.session_state.current_character:
+        # A new character starts a new conversation; the previous one stays
+        # in the store under its own ?session= link
+        st.session_state.session_id = uuid.uuid4().hex
+        st.query_params["session"] = st.session_state.session_id
         st.session_state.current_character = detected
         st.session_state.messages = []
-        st.success(f"Switched to {detected.title()} mode 🎭")
+        st.session_state.has_earlier = False
+        st.session_state.context = None
+        get_store().set_meta(st.session_state.session_id, "characterbot", character=detected)
+        st.success(f"Switched to {get_registry().title(detected)} mode 🎭")
 
-    st.session_state.messages.append({"role": "user", "content": user_input})
+    save_message({"role": "user", "content": user_input})
 
-    if st.session_state.current_character:
-        char_prompt = CHARACTER_PROMPTS[st.session_state.current_character]
-    else:
-        char_prompt = "You are a helpful AI assistant."
-
-    final_prompt = build_prompt(char_prompt, st.session_state.messages)
-
-    response = generate_response(final_prompt)
-
-    st.session_state.messages.append({"role": "assistant", "content": response})
+if st.session_state.get("has_earlier") and st.session_state.messages:
+    st.button("Load earlier messages", on_click=load_earlier)
 
 # Display messages
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
+
+if user_input:
+
+    if st.session_state.current_character in get_registry():
+        char_prompt = get_registry().prompt(st.session_state.current_character)
+    else:
+        char_prompt = DEFAULT_PROMPT
+
+    context = st.session_state.context if CONTINUATION_MODE else None
+    prefix = "continued" if context else "cold"
+
+    done = {}
+    status = st.empty()
+    with get_scheduler().slot(
+        st.session_state.session_id,
+        on_wait=lambda position: status.caption(f"⏳ Waiting for a free slot (position {position})"),
+    ) as ticket:
+        status.empty()
+        if ticket.cancelled:
+            st.stop()  # a newer message from this session took over
+
+        metrics = GenerationMetrics("characterbot", MODEL_NAME, queue_s=ticket.queued_s)
+        if CONTINUATION_MODE and not context and len(st.session_state.messages) == 1:
+            # New conversation: start from the persona's evaluated prefix.
+            # On a miss this turn goes cold and the prefix is warmed for
+            # next time; waiting here could deadlock on the scheduler.
+            context = get_prefix_cache().peek(MODEL_NAME, char_prompt)
+            if context:
+                prefix = "warm"
+            else:
+                get_prefix_cache().prefetch(MODEL_NAME, char_prompt)
+        metrics.labels["prefix"] = prefix
+
+        if context:
+            final_prompt = build_turn_prompt(user_input)
+        else:
+            final_prompt = build_prompt(char_prompt, st.session_state.messages)
+
+        with st.chat_message("assistant"):
+            if STREAM_RESPONSES:
+                stream = ticket.guard(stream_response(final_prompt, context, done))
+                response = st.write_stream(metrics.wrap(stream))
+            else:
+                response = generate_response(final_prompt, context, done)
+                metrics.token()
+                st.markdown(response)
+
+    record = metrics.finish(done)
+    get_metrics_sink().record(record)
+    st.session_state.last_metrics = record
+
+    save_message({"role": "assistant", "content": response})
+    # A failed turn returns no context, so the next one rebuilds from scratch
+    st.session_state.context = done.get("context")
+
+# Last generation stats
+last = st.session_state.last_metrics
+if last:
+    with st.sidebar:
+        st.markdown("### 📊 Last reply")
+        c1, c2 = st.columns(2)
+        c1.metric("TTFT", f"{last['ttft_s']:.2f}s" if last["ttft_s"] is not None else "—")
+        c2.metric("Tokens/s", last["tokens_per_s"] or "—")
+        st.caption(
+            f"Prompt {last['prompt_eval_count'] or 0} tok · generated {last['eval_count'] or 0} tok · "
+            f"ITL p50/p99 {last['itl_p50_ms'] or '—'}/{last['itl_p99_ms'] or '—'} ms · "
+            f"load {last['load_s'] or 0:.2f}s"
+        )
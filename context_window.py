@@ -0,0 +1,74 @@
+from retrieval import estimate_tokens
+
+
+def history_text(msg) -> str:
+    # Assistant turns go back to the model as their answer only; the stored
+    # <think> trace would just burn context
+    if msg["role"] == "assistant":
+        # Not get("answer", msg["content"]): content may be compressed
+        answer = msg.get("answer")
+        return msg["content"] if answer is None else answer
+    return msg["content"]
+
+
+def message_tokens(msg) -> int:
+    # Estimated once per message and kept on the message itself
+    if "tokens" not in msg:
+        msg["tokens"] = estimate_tokens(history_text(msg))
+    return msg["tokens"]
+
+
+# Keeps the prompt's history within a token budget. Newest turns are kept
+# verbatim; anything older is folded into a rolling summary that is
+# produced on a background pool and picked up on a later turn.
+class ContextWindow:
+    def __init__(self, budget: int = 2000, pool=None, batch: int = 4):
+        self.budget = budget
+        self.pool = pool
+        self.batch = batch
+        self.summary = ""
+        self.summary_upto = 0
+        self._future = None
+
+    def reset(self):
+        self.summary = ""
+        self.summary_upto = 0
+        self._future = None
+
+    def build(self, history, summarize=None):
+        if len(history) < self.summary_upto:
+            self.reset()
+        self._collect()
+
+        budget = self.budget - (estimate_tokens(self.summary) if self.summary else 0)
+        start = len(history)
+        used = 0
+        while start > 0:
+            cost = message_tokens(history[start - 1])
+            if used + cost > budget:
+                break
+            used += cost
+            start -= 1
+
+        # Fold dropped turns in a few at a time rather than on every turn
+        if summarize and self.pool and start - self.summary_upto >= self.batch and self._future is None:
+            turns = [{"role": m["role"], "content": history_text(m)} for m in history[self.summary_upto:start]]
+            self._future = self.pool.submit(self._summarize, summarize, self.summary, turns, start)
+
+        recent = [{"role": m["role"], "content": history_text(m)} for m in history[start:]]
+        return (self.summary if start else ""), recent
+
+    def _collect(self):
+        if self._future is None or not self._future.done():
+            return
+        try:
+            summary, upto = self._future.result()
+            if upto > self.summary_upto:
+                self.summary, self.summary_upto = summary, upto
+        except Exception:
+            pass
+        self._future = None
+
+    @staticmethod
+    def _summarize(summarize, previous, turns, upto):
+        return summarize(previous, turns), upto
@@ -0,0 +1,153 @@
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    app        TEXT,
+    meta       TEXT,
+    updated    REAL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT,
+    seq        INTEGER,
+    role       TEXT,
+    content    TEXT,
+    think      TEXT,
+    answer     TEXT,
+    created    REAL,
+    PRIMARY KEY (session_id, seq)
+);
+"""
+
+MESSAGE_FIELDS = ("role", "content", "think", "answer")
+
+
+def _row_to_message(row):
+    seq, role, content, think, answer = row
+    msg = {"seq": seq, "role": role, "content": content}
+    if think is not None:
+        msg["think"] = think
+    if answer is not None:
+        msg["answer"] = answer
+    return msg
+
+
+# Append-only chat history in SQLite (WAL mode). Writes are queued and
+# committed in batches by a background thread so the render path never
+# waits on disk; reads flush the queue first so they see every write.
+class ConversationStore:
+    def __init__(self, path, flush_interval: float = 0.5, batch_size: int = 64):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._next_seq = {}
+        self._seq_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+        self._reader.commit()
+        threading.Thread(target=self._write_loop, name="conversation-store", daemon=True).start()
+        # Don't lose the last batch when the server shuts down
+        atexit.register(self.flush)
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            ops = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # A None marker (from flush) commits the batch without waiting
+            while ops[-1] is not None and len(ops) < self.batch_size:
+                try:
+                    ops.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for op in ops:
+                        if op is not None:
+                            conn.execute(*op)
+            except sqlite3.Error:
+                pass  # a bad batch is rolled back; keep the writer alive for the next one
+            finally:
+                for _ in ops:
+                    self._queue.task_done()
+
+    def flush(self):
+        if self._queue.unfinished_tasks:
+            self._queue.put(None)
+        self._queue.join()
+
+    def _allocate_seq(self, session_id: str) -> int:
+        with self._seq_lock:
+            if session_id not in self._next_seq:
+                self.flush()
+                with self._read_lock:
+                    row = self._reader.execute(
+                        "SELECT COALESCE(MAX(seq), -1) FROM messages WHERE session_id=?", (session_id,)
+                    ).fetchone()
+                self._next_seq[session_id] = row[0] + 1
+            seq = self._next_seq[session_id]
+            self._next_seq[session_id] = seq + 1
+            return seq
+
+    def append(self, session_id: str, msg: dict) -> int:
+        seq = self._allocate_seq(session_id)
+        self._queue.put((
+            "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, seq, *(msg.get(f) for f in MESSAGE_FIELDS), time.time()),
+        ))
+        return seq
+
+    def clear(self, session_id: str):
+        # seq keeps counting up so pages fetched before the clear stay distinct
+        self._queue.put(("DELETE FROM messages WHERE session_id=?", (session_id,)))
+
+    def set_meta(self, session_id: str, app: str, **meta):
+        self._queue.put((
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+            (session_id, app, json.dumps(meta), time.time()),
+        ))
+
+    def get_meta(self, session_id: str) -> dict:
+        self.flush()
+        with self._read_lock:
+            row = self._reader.execute("SELECT meta FROM sessions WHERE session_id=?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def count(self, session_id: str) -> int:
+        self.flush()
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id=?", (session_id,)
+            ).fetchone()[0]
+
+    def load_recent(self, session_id: str, limit: int = 50):
+        return self.load_before(session_id, None, limit)
+
+    def load_before(self, session_id: str, before_seq=None, limit: int = 50):
+        # One page of messages older than before_seq, oldest first
+        self.flush()
+        sql = "SELECT seq, role, content, think, answer FROM messages WHERE session_id=?"
+        params = [session_id]
+        if before_seq is not None:
+            sql += " AND seq < ?"
+            params.append(before_seq)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return [_row_to_message(r) for r in reversed(rows)]
@@ -0,0 +1,97 @@
+import asyncio
+import queue
+import threading
+
+import ollama
+
+from metrics import FINAL_FIELDS, GenerationMetrics, truncated_final
+from retrieval import estimate_tokens
+
+
+async def _direct(open_stream):
+    async for chunk in await open_stream(None):
+        yield chunk
+
+
+async def _stream_model(chunks, model, events, app, budget=None, prompt_tokens=0):
+    metrics = GenerationMetrics(app, model, mode="compare")
+    final = {}
+    try:
+        async for chunk in chunks:
+            metrics.token()
+            delta = chunk.message.content or ""
+            if budget:
+                delta = budget.feed(delta)
+            if chunk.done:
+                final = {k: getattr(chunk, k, None) for k in FINAL_FIELDS}
+            events.put((model, delta, None))
+            if budget and budget.stop_reason and not chunk.done:
+                # Same early stop as a single-model reply; closing the
+                # stream drops the upstream request
+                await chunks.aclose()
+                final = {**truncated_final(prompt_tokens, budget.tokens, metrics.last - metrics.first), **budget.stats()}
+                break
+    except Exception as e:
+        events.put((model, f"⚠ Ollama error: {e}", None))
+    events.put((model, None, metrics.finish(final)))
+
+
+async def _cancel_when_set(cancel, tasks, interval: float = 0.05):
+    # Cancelling a task unwinds its stream, which closes the upstream request
+    while not cancel.is_set():
+        await asyncio.sleep(interval)
+    for task in tasks:
+        task.cancel()
+
+
+# Sends the same messages to several models at once through the async
+# client, so wall time tracks the slowest model rather than the sum.
+# Runs its own event loop on a daemon thread and returns a queue of
+# (model, delta, None) events, ending with one (model, None, record) each.
+# With a router, each model's stream is placed, counted and retried like
+# any other generation; without one everything goes to the default host.
+# Setting `cancel` (a threading.Event) stops every stream; models that
+# were cut off report no record. `options` go to every chat call, and
+# `budget()`, when given, makes a GenerationBudget for each model's reply.
+def fan_out(models, messages, keep_alive=None, router=None, app="jarvisui", cancel=None,
+            options=None, budget=None) -> queue.Queue:
+    events = queue.Queue()
+    prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+
+    async def run():
+        clients = {}
+
+        def opener(model):
+            async def open_stream(ep):
+                url = ep.url if ep else None
+                if url not in clients:
+                    clients[url] = ollama.AsyncClient(url)
+                return await clients[url].chat(
+                    model=model, messages=messages, stream=True, keep_alive=keep_alive, options=options,
+                )
+            return open_stream
+
+        tasks = [
+            asyncio.create_task(_stream_model(
+                router.astream(model, opener(model)) if router else _direct(opener(model)),
+                model, events, app, budget() if budget else None, prompt_tokens,
+            ))
+            for model in models
+        ]
+        watcher = asyncio.create_task(_cancel_when_set(cancel, tasks)) if cancel else None
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if watcher:
+            watcher.cancel()
+
+    threading.Thread(target=asyncio.run, args=(run(),), name="fan-out", daemon=True).start()
+    return events
+
+
+def iter_events(events, count: int):
+    # Yields events until all `count` models have reported their record
+    finished = 0
+    while finished < count:
+        event = events.get()
+        if event[1] is None:
+            finished += 1
+        yield event
@@ -1,38 +1,64 @@
 import streamlit as st
-import ollama
-import json
 import time
 import os
-import tempfile
-import base64
 import hashlib
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
-# ── Optional heavy deps ──────────────────────────────────────────────────────
-try:
-    import speech_recognition as sr
-    VOICE_OK = True
-except ImportError:
-    VOICE_OK = False
-
-try:
-    import pyttsx3
-    TTS_OK = True
-except ImportError:
-    TTS_OK = False
-
-try:
-    import fitz  # PyMuPDF
-    PDF_OK = True
-except ImportError:
-    PDF_OK = False
-
-try:
-    from deep_translator import GoogleTranslator
-    TRANS_OK = True
-except ImportError:
-    TRANS_OK = False
+from capabilities import Capabilities, StartupProfile
+
+# ── Startup profile ───────────────────────────────────────────────────────────
+# Cold-start cost per component, shown in the sidebar and appended to
+# startup.jsonl in the metrics directory once per process
+@st.cache_resource
+def get_startup_profile():
+    return StartupProfile()
+
+STARTUP = get_startup_profile()
+STARTUP.preload(
+    "ollama", "numpy", "context_window", "conversation_store", "metrics", "model_catalog",
+    "pdf_tools", "retrieval", "vector_store", "streaming", "tts", "translation", "fanout", "response_cache", "scheduler", "router",
+)
+
+import ollama
+from context_window import ContextWindow
+from conversation_store import ConversationStore
+from fanout import fan_out, iter_events
+from message import Message, load_messages
+from metrics import FINAL_FIELDS, GenerationMetrics, MetricsSink, truncated_final
+from model_catalog import ModelCatalog
+from pdf_tools import PdfPageCache, iter_pdf_pages
+from response_cache import ResponseCache
+from router import Router
+from scheduler import BACKGROUND_SESSION, Scheduler
+from retrieval import BM25Index, chunk_pages, estimate_tokens
+from vector_store import OllamaEmbedder, VectorStore
+from streaming import GenerationBudget, RenderCoalescer, ThinkStreamParser
+from tts import TTSWorker
+from translation import GoogleBackend, StreamingTranslator, TranslationCache, Translator
+
+# ── Optional features ─────────────────────────────────────────────────────────
+# Only probed here; each module is imported the first time it is used
+@st.cache_resource
+def get_capabilities():
+    return Capabilities(
+        STARTUP,
+        voice="speech_recognition",
+        tts="pyttsx3",
+        pdf="fitz",
+        translate="deep_translator",
+    )
+
+CAPS = get_capabilities()
+VOICE_OK = CAPS.available("voice")
+TTS_OK = CAPS.available("tts")
+PDF_OK = CAPS.available("pdf")
+TRANS_OK = CAPS.available("translate")
+STARTUP.mark("capability probe")
 
 # ── Page config ───────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -43,228 +69,21 @@ st.set_page_config(
 )
 
 # ── CSS ───────────────────────────────────────────────────────────────────────
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=Syne:wght@400;600;800&display=swap');
-
-:root {
-  --bg:       #04040a;
-  --surface:  #0c0c18;
-  --panel:    #10101f;
-  --border:   #1e1e3a;
-  --accent:   #7c3aed;
-  --accent2:  #06b6d4;
-  --accent3:  #f59e0b;
-  --text:     #e2e8f0;
-  --muted:    #64748b;
-  --user-bg:  #1a1030;
-  --bot-bg:   #0d1a2e;
-  --think-bg: #0a1a0a;
-  --think-border: #166534;
-  --glow:     0 0 20px rgba(124,58,237,.35);
-}
-
-* { box-sizing: border-box; }
-
-html, body, [data-testid="stAppViewContainer"] {
-  background: var(--bg) !important;
-  font-family: 'Syne', sans-serif;
-  color: var(--text);
-}
-
-/* Hide default Streamlit chrome */
-#MainMenu, footer, header { visibility: hidden; }
-[data-testid="stDecoration"] { display: none; }
-[data-testid="stToolbar"] { display: none; }
-
-/* ─── TOP NAV ─────────────────────────────────────────────────── */
-.topbar {
-  display: flex;
-  align-items: center;
-  justify-content: space-between;
-  padding: 14px 28px;
-  background: var(--surface);
-  border-bottom: 1px solid var(--border);
-  position: sticky;
-  top: 0;
-  z-index: 999;
-}
-.logo {
-  font-family: 'Space Mono', monospace;
-  font-size: 1.4rem;
-  font-weight: 700;
-  letter-spacing: -0.03em;
-  background: linear-gradient(135deg, var(--accent) 0%, var(--accent2) 100%);
-  -webkit-background-clip: text;
-  -webkit-text-fill-color: transparent;
-}
-.logo span { color: var(--accent3); -webkit-text-fill-color: var(--accent3); }
-.status-pill {
-  display: inline-flex;
-  align-items: center;
-  gap: 6px;
-  background: rgba(6,182,212,.12);
-  border: 1px solid rgba(6,182,212,.3);
-  border-radius: 20px;
-  padding: 4px 12px;
-  font-size: .75rem;
-  color: var(--accent2);
-  font-family: 'Space Mono', monospace;
-}
-.status-dot {
-  width: 7px; height: 7px;
-  border-radius: 50%;
-  background: #22c55e;
-  box-shadow: 0 0 8px #22c55e;
-  animation: pulse 1.8s infinite;
-}
-@keyframes pulse { 0%,100%{opacity:1} 50%{opacity:.4} }
-
-/* ─── SIDEBAR ─────────────────────────────────────────────────── */
-[data-testid="stSidebar"] {
-  background: var(--surface) !important;
-  border-right: 1px solid var(--border) !important;
-}
-[data-testid="stSidebar"] * { color: var(--text) !important; }
-[data-testid="stSidebar"] .stSelectbox > div > div {
-  background: var(--panel) !important;
-  border: 1px solid var(--border) !important;
-  color: var(--text) !important;
-}
-
-/* ─── CHAT AREA ───────────────────────────────────────────────── */
-.chat-wrapper {
-  max-width: 900px;
-  margin: 0 auto;
-  padding: 24px 16px 140px;
-}
-
-.msg-row { display: flex; gap: 12px; margin-bottom: 20px; animation: fadeUp .3s ease; }
-@keyframes fadeUp { from{opacity:0;transform:translateY(10px)} to{opacity:1;transform:translateY(0)} }
-
-.msg-row.user { flex-direction: row-reverse; }
-
-.avatar {
-  width: 38px; height: 38px;
-  border-radius: 10px;
-  display: flex; align-items: center; justify-content: center;
-  font-size: 1rem; flex-shrink: 0;
-  font-family: 'Space Mono', monospace;
-}
-.avatar.bot  { background: linear-gradient(135deg,var(--accent),var(--accent2)); box-shadow: var(--glow); }
-.avatar.user { background: var(--user-bg); border: 1px solid var(--border); }
-
-.bubble {
-  max-width: 78%;
-  padding: 14px 18px;
-  border-radius: 16px;
-  line-height: 1.65;
-  font-size: .93rem;
-}
-.bubble.bot {
-  background: var(--bot-bg);
-  border: 1px solid var(--border);
-  border-top-left-radius: 4px;
-}
-.bubble.user {
-  background: var(--user-bg);
-  border: 1px solid rgba(124,58,237,.3);
-  border-top-right-radius: 4px;
-  text-align: right;
-}
-
-/* ─── THINKING BOX ────────────────────────────────────────────── */
-.think-box {
-  background: var(--think-bg);
-  border: 1px solid var(--think-border);
-  border-radius: 10px;
-  padding: 10px 14px;
-  margin-bottom: 10px;
-  font-family: 'Space Mono', monospace;
-  font-size: .75rem;
-  color: #86efac;
-  cursor: pointer;
-}
-.think-title {
-  display: flex; align-items: center; gap: 8px;
-  font-weight: 700; margin-bottom: 6px;
-  color: #4ade80;
-}
-.think-content { opacity:.75; white-space: pre-wrap; }
-
-/* ─── FEATURE BADGES ──────────────────────────────────────────── */
-.badge {
-  display: inline-flex; align-items: center; gap: 4px;
-  padding: 3px 9px; border-radius: 20px;
-  font-size: .7rem; font-family: 'Space Mono', monospace;
-  margin: 2px;
-}
-.badge.active  { background:rgba(34,197,94,.15); border:1px solid rgba(34,197,94,.4); color:#4ade80; }
-.badge.inactive{ background:rgba(100,116,139,.1); border:1px solid var(--border); color:var(--muted); }
-
-/* ─── INPUT AREA ──────────────────────────────────────────────── */
-.stTextArea textarea {
-  background: var(--panel) !important;
-  border: 1px solid var(--border) !important;
-  border-radius: 12px !important;
-  color: var(--text) !important;
-  font-family: 'Syne', sans-serif !important;
-  font-size: .93rem !important;
-  resize: none !important;
-}
-.stTextArea textarea:focus {
-  border-color: var(--accent) !important;
-  box-shadow: 0 0 0 2px rgba(124,58,237,.25) !important;
-}
-
-/* ─── BUTTONS ─────────────────────────────────────────────────── */
-.stButton > button {
-  background: linear-gradient(135deg, var(--accent), #5b21b6) !important;
-  color: #fff !important;
-  border: none !important;
-  border-radius: 10px !important;
-  font-family: 'Space Mono', monospace !important;
-  font-weight: 700 !important;
-  font-size: .8rem !important;
-  letter-spacing: .05em !important;
-  padding: 10px 20px !important;
-  transition: all .2s !important;
-}
-.stButton > button:hover {
-  transform: translateY(-1px) !important;
-  box-shadow: var(--glow) !important;
-}
-
-/* code blocks inside bubbles */
-.bubble pre { background:#1e1e3a; border-radius:8px; padding:12px; overflow-x:auto; }
-.bubble code { font-family:'Space Mono',monospace; font-size:.82rem; color:#93c5fd; }
-
-/* scrollbar */
-::-webkit-scrollbar { width: 5px; }
-::-webkit-scrollbar-track { background: var(--bg); }
-::-webkit-scrollbar-thumb { background: var(--border); border-radius: 10px; }
-
-/* Metrics */
-[data-testid="stMetric"] {
-  background: var(--panel);
-  border: 1px solid var(--border);
-  border-radius: 12px;
-  padding: 12px !important;
-}
-[data-testid="stMetricValue"] { color: var(--accent2) !important; font-family:'Space Mono',monospace; }
-
-/* File uploader */
-[data-testid="stFileUploader"] {
-  background: var(--panel) !important;
-  border: 1px dashed var(--border) !important;
-  border-radius: 12px !important;
-}
-
-/* Expander */
-details { background: var(--panel); border: 1px solid var(--border); border-radius: 10px; }
-summary { color: var(--accent2) !important; font-family:'Space Mono',monospace; }
-</style>
-""", unsafe_allow_html=True)
+# Served as a static file (see .streamlit/config.toml) so the browser caches
+# it; the content hash in the URL busts that cache whenever the file changes
+STYLESHEET = Path(__file__).parent / "static" / "jarvis.css"
+
+@st.cache_resource
+def get_stylesheet(mtime: float):
+    css = STYLESHEET.read_text(encoding="utf-8")
+    return css, hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+
+css, css_version = get_stylesheet(STYLESHEET.stat().st_mtime)
+if st.get_option("server.enableStaticServing"):
+    st.markdown(f'<link rel="stylesheet" href="app/static/jarvis.css?v={css_version}">', unsafe_allow_html=True)
+else:
+    st.markdown(f"<style>\n{css}</style>", unsafe_allow_html=True)
+STARTUP.mark("page setup")
 
 # ── Session state ─────────────────────────────────────────────────────────────
 def init_state():
@@ -274,12 +93,22 @@ def init_state():
         "lang": "en",
         "voice_enabled": False,
         "thinking_visible": True,
-        "pdf_context": "",
+        "pdf_pages": [],
+        "pdf_digest": "",
+        "rag_mode": "lexical",
         "total_tokens": 0,
         "session_start": datetime.now().strftime("%H:%M"),
+        "session_id": uuid.uuid4().hex,
         "msg_count": 0,
         "last_think": "",
         "last_response": "",
+        "renders_saved": 0,
+        "tts_key": "",
+        "last_metrics": {},
+        "has_earlier": False,
+        "html_cache": {},
+        "last_comparison": None,
+        "cache_responses": False,
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -309,72 +138,332 @@ Format STRICTLY:
 [EXACTLY 4 JARGON WORDS]
 """
 
+# Live streaming placeholders are redrawn at most this often (Hz), or once
+# this many new characters have arrived since the last redraw.
+RENDER_HZ = 20
+RENDER_FLUSH_CHARS = 400
+
+# Only the newest RENDER_WINDOW messages are drawn on a rerun, and each
+# message's HTML is reused until its content or the thinking toggle changes
+RENDER_WINDOW = 40
+
+# How long Ollama keeps a selected/used model loaded after its last request
+MODEL_KEEP_ALIVE = "30m"
+MODEL_LIST_TTL = 30
+
+# Parsed PDFs are cached by content hash; set JARGONBOT_PDF_CACHE to a
+# directory to keep them across restarts as well.
+PDF_CACHE_SIZE = 16
+PDF_CACHE_DIR = os.environ.get("JARGONBOT_PDF_CACHE")
+
+# Opt-in reuse of finished replies for an identical model + prompt (system
+# prompt, history, PDF context); JARGONBOT_RESPONSE_CACHE adds a disk tier
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 3600
+RESPONSE_CACHE_DIR = os.environ.get("JARGONBOT_RESPONSE_CACHE")
+
+# Generation budget: a hard num_predict cap, and an early stop (closing the
+# stream so Ollama stops generating) once the answer after </think> has
+# ANSWER_WORDS words or the think trace passes THINK_TOKEN_BUDGET tokens
+NUM_PREDICT = 2048
+ANSWER_WORDS = 4
+THINK_TOKEN_BUDGET = 1536
+# Ollama nodes to spread generations over (comma-separated in OLLAMA_HOSTS);
+# model listing, warm-up and embeddings go through the same nodes
+OLLAMA_HOSTS = os.environ.get("OLLAMA_HOSTS", os.environ.get("OLLAMA_HOST", "http://localhost:11434")).split(",")
+
+# Generations allowed to run at once in this process; further requests
+# queue, served round-robin across sessions
+MAX_CONCURRENT_GENERATIONS = int(os.environ.get("JARGONBOT_MAX_CONCURRENT", "2"))
+
+GENERATION_OPTIONS = {"num_predict": NUM_PREDICT, "answer_words": ANSWER_WORDS, "think_budget": THINK_TOKEN_BUDGET}
+
+# Large PDFs (PDF_PARALLEL_FROM pages and up) are extracted across a process pool
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+PDF_PARALLEL_FROM = 200
+
+# Only the PDF chunks most relevant to the question go into the prompt
+PDF_CHUNK_WORDS = 220
+PDF_CHUNK_OVERLAP = 40
+RAG_TOP_K = 4
+RAG_TOKEN_BUDGET = 1200
+
+# "Library" retrieval embeds every uploaded PDF into a persistent store
+EMBED_MODEL = "nomic-embed-text"
+LIBRARY_DIR = os.environ.get("JARGONBOT_LIBRARY", str(Path.home() / ".jargonbot" / "library"))
+
+# Translations are cached across restarts in this SQLite file
+TRANSLATION_DB = os.environ.get("JARGONBOT_TRANSLATIONS", str(Path.home() / ".jargonbot" / "translations.sqlite3"))
+TRANSLATION_WORKERS = 4
+
+# Prompt history is capped by estimated tokens; older turns are summarized
+HISTORY_TOKEN_BUDGET = 2000
+SUMMARY_MAX_TOKENS = 200
+
+# Per-generation metrics: JSONL log + Prometheus text file in this directory,
+# and a /metrics endpoint when JARGONBOT_METRICS_PORT is set
+METRICS_DIR = os.environ.get("JARGONBOT_METRICS", str(Path.home() / ".jargonbot" / "metrics"))
+METRICS_PORT = os.environ.get("JARGONBOT_METRICS_PORT")
+
+# Conversations are persisted here and resumed via ?session=<id> in the URL;
+# only the newest HISTORY_PAGE messages are loaded, older ones on demand
+CONVERSATION_DB = os.environ.get("JARGONBOT_DB", str(Path.home() / ".jargonbot" / "conversations.sqlite3"))
+HISTORY_PAGE = 50
+
+# Messages are kept compactly in session state; think traces older than the
+# newest KEEP_RAW_MESSAGES messages are compressed until they're drawn again
+KEEP_RAW_MESSAGES = 8
+
+# Spoken answers are synthesized off the script thread and cached as audio
+TTS_RATE = 165
+TTS_CACHE_DIR = os.environ.get("JARGONBOT_TTS_CACHE", str(Path.home() / ".jargonbot" / "tts"))
+
+@st.cache_resource
+def get_model_catalog():
+    return ModelCatalog(get_router(), ttl=MODEL_LIST_TTL, keep_alive=MODEL_KEEP_ALIVE, slot=background_slot)
+
 def get_ollama_models():
-    try:
-        models = ollama.list()
-        return [m.model for m in models.models] if models.models else ["gemma3"]
-    except:
-        return ["gemma3:latest"]
-
-def extract_think_and_answer(text: str):
-    think = ""
-    answer = text
-    if "<think>" in text and "</think>" in text:
-        start = text.index("<think>") + 7
-        end   = text.index("</think>")
-        think  = text[start:end].strip()
-        answer = text[end+8:].strip()
-    return think, answer
-
-def stream_response(prompt: str, history: list, pdf_ctx: str = ""):
+    models = get_model_catalog().models()
+    return [m.name for m in models] if models else ["gemma3:latest"]
+
+@st.cache_resource
+def get_summary_pool():
+    return ThreadPoolExecutor(2, thread_name_prefix="summarize")
+
+def summarize_turns(router, model: str, previous: str, turns: list) -> str:
+    transcript = "\n".join(f"{t['role'].upper()}: {t['content']}" for t in turns)
+    with background_slot():
+        resp = router.call(model, lambda node: node.client.generate(
+            model=model,
+            prompt=(
+                f"Summary so far:\n{previous or '(none)'}\n\nNew conversation turns:\n{transcript}\n\n"
+                "Rewrite the summary to cover everything above in under 120 words. "
+                "Keep names, facts, decisions and open questions. Output only the summary."
+            ),
+            options={"num_predict": SUMMARY_MAX_TOKENS},
+            keep_alive=MODEL_KEEP_ALIVE,
+        ))
+    return resp.response.strip()
+
+def build_messages(prompt: str, history: list, pdf_ctx: str = ""):
     sys_prompt = JARGON_SYSTEM
     if pdf_ctx:
-        sys_prompt += f"\n\nPDF CONTEXT:\n{pdf_ctx[:4000]}"
+        sys_prompt += f"\n\nPDF CONTEXT:\n{pdf_ctx}"
+
+    if "context_window" not in st.session_state:
+        st.session_state.context_window = ContextWindow(HISTORY_TOKEN_BUDGET, get_summary_pool())
+    model, router = st.session_state.model, get_router()
+    summary, recent = st.session_state.context_window.build(
+        history, lambda previous, turns: summarize_turns(router, model, previous, turns)
+    )
+    if summary:
+        sys_prompt += f"\n\nEARLIER CONVERSATION (summary):\n{summary}"
 
     messages = [{"role": "system", "content": sys_prompt}]
-    for h in history[-12:]:
-        messages.append({"role": h["role"], "content": h["content"]})
+    messages.extend(recent)
     messages.append({"role": "user", "content": prompt})
+    return messages
+
+@st.cache_resource
+def get_router():
+    return Router([h.strip() for h in OLLAMA_HOSTS if h.strip()], client_factory=ollama.Client)
+
+@st.cache_resource
+def get_scheduler():
+    return Scheduler(MAX_CONCURRENT_GENERATIONS)
+
+def background_slot():
+    # Preloads and summaries only run while no user request is waiting
+    return get_scheduler().slot(BACKGROUND_SESSION, background=True)
+
+@contextmanager
+def generation_slot(cost: int = 1):
+    # Waits for a scheduler slot, showing the queue position meanwhile
+    status = st.empty()
+
+    def on_wait(position):
+        busy, waiting = get_scheduler().status()
+        status.caption(f"⏳ Queued · position {position} of {waiting} · {busy}/{MAX_CONCURRENT_GENERATIONS} slots busy")
+
+    with get_scheduler().slot(st.session_state.session_id, cost, on_wait) as ticket:
+        status.empty()
+        if ticket.cancelled:
+            st.stop()  # a newer message from this session took over
+        yield ticket
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_DIR)
+
+def stream_response(prompt: str, history: list, pdf_ctx: str = "", done: dict = None):
+    messages = build_messages(prompt, history, pdf_ctx)
+    model, router = st.session_state.model, get_router()
+    if not st.session_state.cache_responses:
+        yield from ollama_stream(router, model, messages, done)
+        return
+    # Identical requests in flight from other sessions share one generation
+    cache = get_response_cache()
+    yield from cache.stream(
+        cache.key(model, messages, GENERATION_OPTIONS),
+        lambda final: ollama_stream(router, model, messages, final),
+        done,
+    )
 
-    full = ""
+def ollama_stream(router, model: str, messages: list, done: dict = None):
+    # No session state in here: the response cache may run it on its own thread
+    budget = GenerationBudget(ANSWER_WORDS, THINK_TOKEN_BUDGET, NUM_PREDICT)
     try:
-        for chunk in ollama.chat(
-            model=st.session_state.model,
+        # Routed to the least busy healthy node; failures before the first
+        # chunk are retried on another one
+        stream = router.stream(model, lambda node: node.client.chat(
+            model=model,
             messages=messages,
             stream=True,
-        ):
-            delta = chunk.message.content or ""
-            full += delta
-            yield delta, full
+            keep_alive=MODEL_KEEP_ALIVE,
+            options={"num_predict": NUM_PREDICT},
+        ))
+        first = None
+        for chunk in stream:
+            first = first or time.perf_counter()
+            delta = budget.feed(chunk.message.content or "")
+            if chunk.done:
+                if done is not None:
+                    done.update({k: getattr(chunk, k, None) for k in FINAL_FIELDS})
+                yield delta
+                return
+            yield delta
+            if budget.stop_reason:
+                # Dropping the connection makes Ollama abandon the request,
+                # so its final stats never arrive; record local estimates
+                stream.close()
+                if done is not None:
+                    prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+                    done.update(truncated_final(prompt_tokens, budget.tokens, time.perf_counter() - first))
+                    done.update(budget.stats())
+                return
     except Exception as e:
-        err = f"⚠ Ollama error: {e}\n\nMake sure `ollama serve` is running and model is pulled."
-        yield err, err
+        yield f"⚠ Ollama error: {e}\n\nMake sure `ollama serve` is running and model is pulled."
+
+@st.cache_resource
+def get_metrics_sink():
+    sink = MetricsSink(METRICS_DIR, "jarvisui")
+    if METRICS_PORT:
+        sink.serve(int(METRICS_PORT))
+    return sink
+
+@st.cache_resource
+def get_conversation_store():
+    return ConversationStore(CONVERSATION_DB)
+
+def resume_session():
+    # Once per browser session: pick up the id from the URL, or publish ours
+    if st.session_state.get("resumed"):
+        return
+    st.session_state.resumed = True
+    sid = st.query_params.get("session")
+    if sid and sid != st.session_state.session_id:
+        store = get_conversation_store()
+        st.session_state.session_id = sid
+        st.session_state.messages = load_messages(store.load_recent(sid, HISTORY_PAGE), KEEP_RAW_MESSAGES)
+        st.session_state.msg_count = store.count(sid)
+        st.session_state.has_earlier = st.session_state.msg_count > len(st.session_state.messages)
+    st.query_params["session"] = st.session_state.session_id
+
+def load_earlier():
+    msgs = st.session_state.messages
+    if len(msgs) > st.session_state.render_window:
+        st.session_state.render_window += RENDER_WINDOW
+        return
+    page = load_messages(get_conversation_store().load_before(
+        st.session_state.session_id, msgs[0]["seq"] if msgs else None, HISTORY_PAGE
+    ))
+    st.session_state.messages = page + msgs
+    st.session_state.render_window += len(page)
+    st.session_state.has_earlier = len(page) == HISTORY_PAGE
+    # History indices shifted, so the rolling summary starts over
+    st.session_state.pop("context_window", None)
+
+def add_message(msg: dict):
+    # Writes are queued; the store commits them off the render path
+    msg = Message.from_dict(msg)
+    msg["seq"] = get_conversation_store().append(st.session_state.session_id, msg)
+    messages = st.session_state.messages
+    messages.append(msg)
+    st.session_state.msg_count += 1
+    if len(messages) > KEEP_RAW_MESSAGES:
+        messages[-KEEP_RAW_MESSAGES - 1].compact()
+
+@st.cache_resource
+def get_pdf_cache():
+    return PdfPageCache(PDF_CACHE_SIZE, PDF_CACHE_DIR)
 
-def read_pdf(uploaded_file) -> str:
+def read_pdf(uploaded_file, progress=None):
     if not PDF_OK:
-        return "PyMuPDF not installed. Run: pip install pymupdf"
+        return "", ["PyMuPDF not installed. Run: pip install pymupdf"]
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as f:
-            f.write(uploaded_file.read())
-            tmp = f.name
-        doc = fitz.open(tmp)
-        text = "\n\n".join(page.get_text() for page in doc)
-        doc.close()
-        os.unlink(tmp)
-        return text
+        # The uploader keeps the file across reruns; parse each document once
+        data = uploaded_file.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        cache = get_pdf_cache()
+        pages = cache.get(digest)
+        if pages is None:
+            pages = []
+
+            def page_stream():
+                for done, total, text in iter_pdf_pages(data, PDF_WORKERS, parallel_from=PDF_PARALLEL_FROM):
+                    pages.append(text)
+                    if progress:
+                        progress(done, total)
+                    yield text
+
+            # The index chunks pages as they arrive; drain whatever it didn't
+            # need (e.g. an index already cached for this digest)
+            stream = page_stream()
+            get_pdf_index(digest, stream)
+            for _ in stream:
+                pass
+            cache.put(digest, pages)
+        return digest, pages
     except Exception as e:
-        return f"PDF read error: {e}"
+        return "", [f"PDF read error: {e}"]
+
+@st.cache_resource(max_entries=8)
+def get_pdf_index(digest: str, _pages):
+    # Built once per document; the digest is the cache key, not the pages
+    return BM25Index(chunk_pages(_pages, PDF_CHUNK_WORDS, PDF_CHUNK_OVERLAP))
+
+@st.cache_resource
+def get_vector_store():
+    return VectorStore(LIBRARY_DIR, OllamaEmbedder(get_router(), EMBED_MODEL))
+
+def retrieve_pdf_context(question: str) -> str:
+    if st.session_state.rag_mode == "library" and len(get_vector_store()):
+        try:
+            return "\n\n---\n\n".join(get_vector_store().select(question, RAG_TOP_K, RAG_TOKEN_BUDGET))
+        except Exception:
+            pass  # embedding model unavailable: fall back to the attached PDF
+    if not st.session_state.pdf_pages:
+        return ""
+    index = get_pdf_index(st.session_state.pdf_digest, st.session_state.pdf_pages)
+    return "\n\n---\n\n".join(index.select(question, RAG_TOP_K, RAG_TOKEN_BUDGET))
+
+@st.cache_resource
+def get_translator():
+    # Swap GoogleBackend for any object with .name and .translate(text, source, target)
+    return Translator(GoogleBackend(), TranslationCache(TRANSLATION_DB))
+
+@st.cache_resource
+def get_translation_pool():
+    return ThreadPoolExecutor(TRANSLATION_WORKERS, thread_name_prefix="translate")
 
 def translate_text(text: str, target: str) -> str:
     if not TRANS_OK or target == "en":
         return text
-    try:
-        return GoogleTranslator(source="auto", target=target).translate(text)
-    except:
-        return text
+    return get_translator().translate(text, target)
 
 def voice_to_text() -> str:
-    if not VOICE_OK:
+    sr = CAPS.load("voice")
+    if sr is None:
         return ""
     r = sr.Recognizer()
     with sr.Microphone() as src:
@@ -385,21 +474,98 @@ def voice_to_text() -> str:
     except:
         return ""
 
+@st.cache_resource
+def get_tts_worker():
+    return TTSWorker(CAPS.load("tts").init, TTS_CACHE_DIR, rate=TTS_RATE)
+
 def speak_text(text: str):
-    if not TTS_OK:
+    if CAPS.load("tts") is None:
         return
-    engine = pyttsx3.init()
-    engine.setProperty("rate", 165)
-    engine.say(text)
-    engine.runAndWait()
+    # Returns immediately; tts_player picks the audio up once it is ready
+    st.session_state.tts_key = get_tts_worker().submit(text, st.session_state.session_id)
 
-def render_message(role: str, content: str, think: str = "", idx: int = 0):
+def tts_player():
+    path = get_tts_worker().result(st.session_state.tts_key)
+    if path:
+        st.audio(path, format="audio/wav", autoplay=True)
+    else:
+        tts_wait()
+
+# Only drawn while the audio is being synthesized, so nothing keeps polling
+# once it's ready; the full rerun then draws the player
+@st.fragment(run_every=0.5)
+def tts_wait():
+    if get_tts_worker().result(st.session_state.tts_key):
+        st.rerun()
+
+def run_comparison(prompt: str, history: list, pdf_ctx: str = ""):
+    # Streams every model into its own column; returns the selected
+    # model's (full text, think, answer) for the chat history
+    models = [st.session_state.model] + st.session_state.compare_models
+    messages = build_messages(prompt, history, pdf_ctx)
+    slots = {}
+    for col, model in zip(st.columns(len(models)), models):
+        col.markdown(f"**{model}**")
+        slots[model] = col.empty()
+    parsers = {model: ThinkStreamParser() for model in models}
+
+    def render_live(parsers):
+        for model, parser in parsers.items():
+            think_html = ""
+            if parser.think_tail and st.session_state.thinking_visible:
+                think_html = f'''<div class="think-box"><div class="think-content">{parser.think_tail}</div></div>'''
+            slots[model].markdown(f"{think_html}**{parser.answer}**", unsafe_allow_html=True)
+
+    live = RenderCoalescer(render_live, hz=RENDER_HZ, max_chars=RENDER_FLUSH_CHARS)
+    records = {}
+    # One slot per model, so a comparison counts fully against the limit
+    with generation_slot(len(models)) as ticket:
+        started = time.perf_counter()
+        cancel = threading.Event()
+        events = fan_out(
+            models, messages, MODEL_KEEP_ALIVE, get_router(), cancel=cancel,
+            options={"num_predict": NUM_PREDICT},
+            budget=lambda: GenerationBudget(ANSWER_WORDS, THINK_TOKEN_BUDGET, NUM_PREDICT),
+        )
+        try:
+            for model, delta, record in iter_events(events, len(models)):
+                if record is None:
+                    parsers[model].feed(delta)
+                    live.update(parsers, chars=len(delta))
+                else:
+                    records[model] = record
+                if ticket.cancelled:
+                    break
+        finally:
+            # Also stops the models when the script is interrupted mid-stream
+            cancel.set()
+        if ticket.cancelled:
+            st.stop()  # a newer message from this session took over
+        live.close()
+        wall = time.perf_counter() - started
+
+    results = []
+    for model in models:
+        record = records[model]
+        get_metrics_sink().record(record)
+        st.session_state.total_tokens += (record["eval_count"] or 0) + (record["prompt_eval_count"] or 0)
+        think, answer = parsers[model].result()
+        if record.get("stop_reason") == "think_budget":
+            think, answer = parsers[model].think.strip(), "⏹ Thinking budget reached"
+        if st.session_state.lang != "en":
+            answer = translate_text(answer, st.session_state.lang)
+        results.append({"model": model, "text": parsers[model].text, "think": think, "answer": answer, "record": record})
+    st.session_state.last_comparison = {"wall_s": wall, "results": results}
+    st.session_state.last_metrics = records[models[0]]
+    return results[0]["text"], results[0]["think"], results[0]["answer"]
+
+def message_html(role: str, content: str, think: str = "", idx: int = 0) -> str:
     if role == "user":
-        st.markdown(f"""
+        return f"""
         <div class="msg-row user">
           <div class="avatar user">U</div>
           <div class="bubble user">{content}</div>
-        </div>""", unsafe_allow_html=True)
+        </div>"""
     else:
         think_html = ""
         if think and st.session_state.thinking_visible:
@@ -411,11 +577,27 @@ def render_message(role: str, content: str, think: str = "", idx: int = 0):
             </div>"""
 
         answer_html = content.replace("<","&lt;").replace(">","&gt;") if content else ""
-        st.markdown(f"""
+        return f"""
         <div class="msg-row">
           <div class="avatar bot">J</div>
           <div class="bubble bot">{think_html}<div style="font-weight:700;font-size:1rem;color:#e2e8f0">{answer_html}</div></div>
-        </div>""", unsafe_allow_html=True)
+        </div>"""
+
+def render_message(msg: Message, idx: int, cache: dict):
+    # Keyed by (message id, content hash, thinking toggle); the digest is
+    # computed once and kept on the message
+    if "digest" not in msg:
+        raw = f"{msg['content']}\0{msg.get('answer', '')}\0{msg.get('think', '')}"
+        msg["digest"] = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    msg_id = msg.get("seq", idx)
+    key = (msg_id, msg["digest"], st.session_state.thinking_visible)
+    html = st.session_state.html_cache.get(key)
+    if html is None:
+        html = message_html(msg["role"], msg.get("answer", msg["content"]), msg.get("think", ""), msg_id)
+    cache[key] = html
+    st.markdown(html, unsafe_allow_html=True)
+
+resume_session()
 
 # ── Top bar ───────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -434,6 +616,25 @@ with st.sidebar:
     sel_model = st.selectbox("🤖 Model", models, index=models.index(preferred) if preferred in models else 0)
     st.session_state.model = sel_model
 
+    # Preload the selection so the first message isn't a cold start
+    catalog = get_model_catalog()
+    catalog.warm(sel_model)
+    info = catalog.get(sel_model)
+    if info:
+        meta = [info.parameter_size, info.quantization, info.size]
+        if info.context_length:
+            meta.append(f"{info.context_length:,} ctx")
+        st.caption(" · ".join(m for m in meta if m))
+    resident = sorted(catalog.resident())
+    st.caption("🟢 Loaded: " + (", ".join(resident) if resident else "none"))
+    for url, state, running, _ in get_router().status():
+        st.caption(f"🖧 {url.split('://')[-1]} · {state} · {running} running")
+
+    # Extra models get the same prompt concurrently, shown side by side
+    st.session_state.compare_models = st.multiselect(
+        "⚖ Compare with", [m for m in models if m != sel_model], key="compare_select"
+    )
+
     st.markdown("---")
     st.markdown("### 🌍 LANGUAGE")
     lang_name = st.selectbox("Output Language", list(LANG_MAP.keys()))
@@ -443,21 +644,44 @@ with st.sidebar:
     st.markdown("### 🎛 FEATURES")
     st.session_state.thinking_visible = st.toggle("🧠 Show Thinking Process", value=True)
     st.session_state.voice_enabled    = st.toggle("🔊 Text-to-Speech", value=False)
+    st.session_state.cache_responses  = st.toggle("♻ Reuse Cached Answers", value=False)
 
     st.markdown("---")
     st.markdown("### 📄 PDF READER")
+    rag_label = st.radio(
+        "Retrieval", ["Current PDF (keywords)", "PDF library (embeddings)"],
+        index=1 if st.session_state.rag_mode == "library" else 0,
+    )
+    st.session_state.rag_mode = "library" if rag_label.startswith("PDF library") else "lexical"
     pdf_file = st.file_uploader("Upload PDF", type=["pdf"])
     if pdf_file:
         with st.spinner("Parsing PDF…"):
-            ctx = read_pdf(pdf_file)
-            st.session_state.pdf_context = ctx
-        word_count = len(ctx.split())
-        st.success(f"✅ {word_count:,} words loaded")
+            bar = st.empty()
+            digest, pages = read_pdf(
+                pdf_file,
+                lambda done, total: bar.progress(done / total, text=f"Page {done:,}/{total:,}"),
+            )
+            bar.empty()
+            st.session_state.pdf_digest = digest
+            st.session_state.pdf_pages = pages
+        word_count = sum(len(p.split()) for p in pages)
+        st.success(f"✅ {word_count:,} words loaded · {len(pages):,} pages")
         with st.expander("Preview"):
-            st.text(ctx[:500] + "…" if len(ctx) > 500 else ctx)
-    if st.session_state.pdf_context:
+            head = "\n\n".join(pages[:2])
+            st.text(head[:500] + "…" if len(head) > 500 else head)
+        store = get_vector_store()
+        if st.session_state.rag_mode == "library" and digest and digest not in store:
+            with st.spinner("Embedding into library…"):
+                try:
+                    chunks = get_pdf_index(digest, pages).chunks
+                    store.add(digest, pdf_file.name, chunks)
+                except Exception as e:
+                    st.warning(f"Embedding failed ({e}). Run: ollama pull {EMBED_MODEL}")
+    if st.session_state.rag_mode == "library":
+        st.caption(f"📚 {len(get_vector_store())} document(s) in library")
+    if st.session_state.pdf_pages:
         if st.button("🗑 Clear PDF"):
-            st.session_state.pdf_context = ""
+            st.session_state.pdf_pages = []
             st.rerun()
 
     st.markdown("---")
@@ -479,12 +703,37 @@ with st.sidebar:
     c1, c2 = st.columns(2)
     c1.metric("Messages", st.session_state.msg_count)
     c2.metric("Session", st.session_state.session_start)
+    c3, c4 = st.columns(2)
+    c3.metric("Tokens", f"{st.session_state.total_tokens:,}")
+    last = st.session_state.last_metrics
+    c4.metric("TTFT", f"{last['ttft_s']:.2f}s" if last.get("ttft_s") is not None else "—")
+    if last:
+        # Early-stopped replies carry local estimates, not Ollama's stats
+        approx = "" if last.get("complete") else "~"
+        load = f"{last['load_s']:.2f}s" if last.get("load_s") is not None else "—"
+        st.caption(
+            f"Last reply: {approx}{last.get('tokens_per_s') or '—'} tok/s · "
+            f"prompt {approx}{last.get('prompt_eval_count') or 0} tok · "
+            f"ITL p50/p99 {last.get('itl_p50_ms') or '—'}/{last.get('itl_p99_ms') or '—'} ms · "
+            f"load {load}"
+        )
+        if last.get("stop_reason"):
+            st.caption(
+                f"Stopped early ({last['stop_reason']}) after {last.get('eval_count') or 0} tokens · "
+                f"{last['num_predict_headroom']:,} of num_predict unused"
+            )
+    st.caption(f"Live redraws skipped last reply: {st.session_state.renders_saved:,}")
 
     st.markdown("---")
     if st.button("🗑 Clear History"):
+        get_conversation_store().clear(st.session_state.session_id)
         st.session_state.messages  = []
+        st.session_state.has_earlier = False
+        st.session_state.render_window = RENDER_WINDOW
+        st.session_state.last_comparison = None
         st.session_state.msg_count = 0
-        st.session_state.pdf_context = ""
+        st.session_state.pdf_pages = []
+        st.session_state.pop("context_window", None)
         st.rerun()
 
     st.markdown("---")
@@ -505,9 +754,17 @@ with st.sidebar:
         badges += f'<span class="badge {cls}">{icon} {name}</span>'
     st.markdown(badges, unsafe_allow_html=True)
 
+STARTUP.mark("sidebar")
+
 # ── Main chat ─────────────────────────────────────────────────────────────────
 st.markdown('<div class="chat-wrapper">', unsafe_allow_html=True)
 
+st.session_state.setdefault("render_window", RENDER_WINDOW)
+messages = st.session_state.messages
+first = max(len(messages) - st.session_state.render_window, 0)
+if first or st.session_state.has_earlier:
+    st.button("⬆ Load earlier messages", on_click=load_earlier)
+
 if not st.session_state.messages:
     st.markdown("""
     <div style="text-align:center;padding:60px 20px;opacity:.5;">
@@ -517,16 +774,37 @@ if not st.session_state.messages:
     </div>
     """, unsafe_allow_html=True)
 
-for i, msg in enumerate(st.session_state.messages):
-    render_message(
-        msg["role"],
-        msg.get("answer", msg["content"]),
-        msg.get("think", ""),
-        i,
-    )
+# Only this rerun's entries are kept, so the cache stays window-sized
+html_cache = {}
+for i in range(first, len(messages)):
+    render_message(messages[i], i, html_cache)
+st.session_state.html_cache = html_cache
+
+comparison = st.session_state.last_comparison
+if comparison:
+    st.markdown("**⚖ MODEL COMPARISON**")
+    for col, res in zip(st.columns(len(comparison["results"])), comparison["results"]):
+        rec = res["record"]
+        col.markdown(f"**{res['model']}**")
+        col.markdown(res["answer"] or "—")
+        col.caption(
+            f"TTFT {rec['ttft_s'] if rec['ttft_s'] is not None else '—'}s · total {rec['total_s']:.2f}s · "
+            f"{rec['eval_count'] or 0} tok · {rec['tokens_per_s'] or '—'} tok/s"
+        )
+    summed = sum(res["record"]["total_s"] for res in comparison["results"])
+    st.caption(f"Wall time {comparison['wall_s']:.2f}s · sum of per-model latencies {summed:.2f}s")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+if TTS_OK and st.session_state.voice_enabled and st.session_state.tts_key:
+    tts_player()
+
+STARTUP.mark("chat render")
+STARTUP.finish(get_metrics_sink().directory / "startup.jsonl")
+with st.sidebar.expander("⏱ Startup profile"):
+    st.caption(f"Cold start to first render: {STARTUP.total() * 1000:.0f} ms")
+    st.markdown("\n".join(f"- `{name}` {secs * 1000:.1f} ms" for name, secs in STARTUP.report()))
+
 # ── Input area ────────────────────────────────────────────────────────────────
 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -562,36 +840,40 @@ if send and user_input.strip():
 
     # Translate input to English for model if needed
     if st.session_state.lang != "en" and TRANS_OK:
-        prompt_en = GoogleTranslator(source="auto", target="en").translate(prompt)
+        prompt_en = get_translator().translate(prompt, "en")
     else:
         prompt_en = prompt
 
     # Add user message
-    st.session_state.messages.append({"role": "user", "content": prompt, "answer": prompt})
-    st.session_state.msg_count += 1
+    add_message({"role": "user", "content": prompt, "answer": prompt})
 
     # Stream response
-    thinking_placeholder = st.empty()
-    answer_placeholder   = st.empty()
-
-    full_text = ""
-    with st.spinner(""):
-        stream = stream_response(
+    st.session_state.last_comparison = None
+    if st.session_state.compare_models:
+        full_text, think_final, answer_final = run_comparison(
             prompt_en,
             [m for m in st.session_state.messages[:-1]],
-            st.session_state.pdf_context,
+            retrieve_pdf_context(prompt_en),
         )
+    else:
+        thinking_placeholder = st.empty()
+        answer_placeholder   = st.empty()
+
+        # Non-English answers are translated sentence by sentence while streaming
+        pipe = None
+        if st.session_state.lang != "en" and TRANS_OK:
+            pipe = StreamingTranslator(get_translator(), st.session_state.lang, get_translation_pool())
 
-        for delta, accumulated in stream:
-            full_text = accumulated
-            think_live, ans_live = extract_think_and_answer(full_text)
+        def render_live(parser):
+            think_live = parser.think_tail
+            ans_live = pipe.preview() if pipe and pipe.fed else parser.answer
 
             # Show live thinking
             if think_live and st.session_state.thinking_visible:
                 thinking_placeholder.markdown(f"""
                 <div class="think-box">
                   <div class="think-title">⚡ PROCESSING…</div>
-                  <div class="think-content">{think_live[-600:]}</div>
+                  <div class="think-content">{think_live}</div>
                 </div>""", unsafe_allow_html=True)
 
             if ans_live:
@@ -601,19 +883,51 @@ if send and user_input.strip():
                   {ans_live}
                 </div>""", unsafe_allow_html=True)
 
-    # Clear live placeholders
-    thinking_placeholder.empty()
-    answer_placeholder.empty()
-
-    # Final parse
-    think_final, answer_final = extract_think_and_answer(full_text)
-
-    # Translate answer if needed
-    if st.session_state.lang != "en":
-        answer_final = translate_text(answer_final, st.session_state.lang)
+        parser = ThinkStreamParser()
+        live = RenderCoalescer(render_live, hz=RENDER_HZ, max_chars=RENDER_FLUSH_CHARS)
+        done = {}
+        with generation_slot() as ticket, st.spinner(""):
+            metrics = GenerationMetrics("jarvisui", st.session_state.model, queue_s=ticket.queued_s)
+            stream = stream_response(
+                prompt_en,
+                [m for m in st.session_state.messages[:-1]],
+                retrieve_pdf_context(prompt_en),
+                done,
+            )
+
+            # The guard stops (and closes the stream) if this session submits again
+            for delta in metrics.wrap(ticket.guard(stream)):
+                answered = parser.feed(delta)
+                if pipe:
+                    pipe.feed(answered)
+                live.update(parser, chars=len(delta))
+            st.session_state.renders_saved = live.close()
+
+        record = metrics.finish(done)
+        if done.get("cached"):
+            record["cached"] = True
+        get_metrics_sink().record(record)
+        st.session_state.last_metrics = record
+        st.session_state.total_tokens += (record["eval_count"] or 0) + (record["prompt_eval_count"] or 0)
+
+        # Clear live placeholders
+        thinking_placeholder.empty()
+        answer_placeholder.empty()
+
+        # Final parse
+        full_text = parser.text
+        think_final, answer_final = parser.result()
+        if done.get("stop_reason") == "think_budget":
+            think_final, answer_final = parser.think.strip(), "⏹ Thinking budget reached"
+
+        # Translate answer if needed
+        if pipe and pipe.fed:
+            answer_final = pipe.finish().strip()
+        elif st.session_state.lang != "en":
+            answer_final = translate_text(answer_final, st.session_state.lang)
 
     # Store
-    st.session_state.messages.append({
+    add_message({
         "role": "assistant",
         "content": full_text,
         "think":  think_final,
@@ -621,7 +935,6 @@ if send and user_input.strip():
     })
     st.session_state.last_think    = think_final
     st.session_state.last_response = answer_final
-    st.session_state.msg_count += 1
 
     # TTS
     if st.session_state.voice_enabled and answer_final:
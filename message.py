@@ -0,0 +1,102 @@
+import zlib
+
+FIELDS = ("role", "content", "think", "answer", "seq", "tokens", "digest")
+SETTABLE = ("role", "seq", "tokens", "digest")
+
+
+def _span(text: str, part, last: bool = False):
+    # (start, end) of part inside text, or part itself when it isn't a slice
+    if not part:
+        return part
+    start = text.rfind(part) if last else text.find(part)
+    return (start, start + len(part)) if start >= 0 else part
+
+
+# One chat message, readable like the dict it replaces (msg["answer"],
+# msg.get("think", ""), "seq" in msg). The raw text is stored once; think
+# and answer are (start, end) offsets into it when they are slices of it,
+# which model replies usually are. compact() zlib-compresses the raw text
+# of an older turn with a think trace, and it is decompressed again only
+# when read. content, think and answer are fixed at creation.
+class Message:
+    __slots__ = ("role", "seq", "tokens", "digest", "_text", "_think", "_answer")
+
+    def __init__(self, role: str, content: str, think=None, answer=None, seq=None):
+        self.role = role
+        self.seq = seq
+        self.tokens = None
+        self.digest = None
+        self._text = content
+        self._think = _span(content, think)
+        self._answer = _span(content, answer, last=True)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Message":
+        msg = cls(d["role"], d["content"], d.get("think"), d.get("answer"), d.get("seq"))
+        msg.tokens = d.get("tokens")
+        msg.digest = d.get("digest")
+        return msg
+
+    @property
+    def compressed(self) -> bool:
+        return isinstance(self._text, bytes)
+
+    @property
+    def content(self) -> str:
+        if self.compressed:
+            return zlib.decompress(self._text).decode("utf-8")
+        return self._text
+
+    def _part(self, part):
+        if isinstance(part, tuple):
+            return self.content[part[0]:part[1]]
+        return part
+
+    @property
+    def think(self):
+        return self._part(self._think)
+
+    @property
+    def answer(self):
+        return self._part(self._answer)
+
+    def compact(self, min_size: int = 256) -> bool:
+        # Compresses the raw text when there's a think trace worth it; the
+        # answer is copied out first so history building never decompresses
+        if self.compressed or not self._think or len(self._text) < min_size:
+            return False
+        self._answer = self.answer
+        self._text = zlib.compress(self._text.encode("utf-8"))
+        return True
+
+    # ── dict-style access ──
+    def get(self, key: str, default=None):
+        if key not in FIELDS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        if key not in SETTABLE:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def to_dict(self) -> dict:
+        return {key: self.get(key) for key in FIELDS if key in self}
+
+
+def load_messages(rows, keep_raw: int = 0):
+    # Messages from stored dicts; all but the newest keep_raw are compacted
+    messages = [Message.from_dict(row) for row in rows]
+    for msg in messages[:max(len(messages) - keep_raw, 0)]:
+        msg.compact()
+    return messages
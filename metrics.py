@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Timing/count fields Ollama reports on the final chunk (durations in ns)
+FINAL_FIELDS = (
+    "eval_count", "prompt_eval_count", "eval_duration",
+    "prompt_eval_duration", "load_duration", "total_duration",
+)
+
+TTFT_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+
+def truncated_final(prompt_tokens: int, eval_count: int, eval_s=None) -> dict:
+    # Stands in for Ollama's final chunk when the stream was closed before
+    # it arrived: the prompt size is estimated and the eval time is taken
+    # from the stream itself; prompt-eval and load time stay unknown
+    return {
+        "eval_count": eval_count,
+        "prompt_eval_count": prompt_tokens,
+        "eval_duration": int(eval_s * 1e9) if eval_s else None,
+    }
+
+
+def _field(final, name):
+    if final is None:
+        return None
+    if isinstance(final, dict):
+        return final.get(name)
+    return getattr(final, name, None)
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+# Timings for one generation: wrap the token stream, then finish() with the
+# final Ollama chunk to get a flat record.
+class GenerationMetrics:
+    def __init__(self, app: str, model: str, clock=time.perf_counter, **labels):
+        self.app = app
+        self.model = model
+        self.labels = labels
+        self.clock = clock
+        self.started = clock()
+        self.first = None
+        self.last = None
+        self.gaps = []
+        self.chunks = 0
+
+    def token(self):
+        now = self.clock()
+        if self.first is None:
+            self.first = now
+        else:
+            self.gaps.append(now - self.last)
+        self.last = now
+        self.chunks += 1
+
+    def wrap(self, stream):
+        for item in stream:
+            self.token()
+            yield item
+
+    def finish(self, final=None) -> dict:
+        stats = {name: _field(final, name) for name in FINAL_FIELDS}
+        ns = 1e-9
+        record = {
+            "ts": time.time(),
+            "app": self.app,
+            "model": self.model,
+            **self.labels,
+            "ttft_s": None if self.first is None else round(self.first - self.started, 4),
+            "total_s": round(self.clock() - self.started, 4),
+            "chunks": self.chunks,
+            "itl_p50_ms": None,
+            "itl_p95_ms": None,
+            "itl_p99_ms": None,
+            "eval_count": stats["eval_count"],
+            "prompt_eval_count": stats["prompt_eval_count"],
+            "eval_s": stats["eval_duration"] and stats["eval_duration"] * ns,
+            "prompt_eval_s": stats["prompt_eval_duration"] and stats["prompt_eval_duration"] * ns,
+            "load_s": stats["load_duration"] and stats["load_duration"] * ns,
+            "tokens_per_s": None,
+            # False when the stats aren't Ollama's own (early stop, error,
+            # cache hit), so aggregates can tell estimates from complete ones
+            "complete": stats["total_duration"] is not None,
+            # Set when a GenerationBudget cut the reply short
+            "stop_reason": _field(final, "stop_reason"),
+            "num_predict_headroom": _field(final, "num_predict_headroom") or 0,
+        }
+        for q in (50, 95, 99):
+            p = _percentile(self.gaps, q)
+            record[f"itl_p{q}_ms"] = None if p is None else round(p * 1000, 2)
+        if stats["eval_count"] and stats["eval_duration"]:
+            record["tokens_per_s"] = round(stats["eval_count"] / (stats["eval_duration"] * ns), 2)
+        return record
+
+
+# Appends every record to a shared JSONL log and keeps per-model aggregates
+# in Prometheus text format, rewritten to a .prom file (for a textfile
+# collector) and optionally served over HTTP at /metrics.
+class MetricsSink:
+    def __init__(self, directory, app: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.jsonl_path = self.directory / "generations.jsonl"
+        # One .prom file per app process so they don't overwrite each other
+        self.prom_path = self.directory / f"{app}.prom"
+        self._lock = threading.Lock()
+        self._series = {}
+        self._server = None
+
+    def record(self, rec: dict):
+        with self._lock:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+            complete = "true" if rec.get("complete") else "false"
+            s = self._series.setdefault((rec["app"], rec["model"], complete), {
+                "requests": 0, "eval_tokens": 0, "prompt_tokens": 0, "eval_seconds": 0.0,
+                "prompt_eval_seconds": 0.0, "load_seconds": 0.0, "early_stops": 0, "ttft_sum": 0.0, "ttft_count": 0,
+                "ttft_buckets": [0] * len(TTFT_BUCKETS),
+            })
+            s["requests"] += 1
+            s["eval_tokens"] += rec["eval_count"] or 0
+            s["prompt_tokens"] += rec["prompt_eval_count"] or 0
+            s["eval_seconds"] += rec["eval_s"] or 0
+            s["prompt_eval_seconds"] += rec["prompt_eval_s"] or 0
+            s["load_seconds"] += rec["load_s"] or 0
+            s["early_stops"] += 1 if rec.get("stop_reason") else 0
+            if rec["ttft_s"] is not None:
+                s["ttft_sum"] += rec["ttft_s"]
+                s["ttft_count"] += 1
+                for i, bound in enumerate(TTFT_BUCKETS):
+                    if rec["ttft_s"] <= bound:
+                        s["ttft_buckets"][i] += 1
+            text = self._render()
+            tmp = self.prom_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, self.prom_path)
+
+    def _render(self) -> str:
+        counters = (
+            ("requests", "ollama_generations_total", "Finished generations"),
+            ("eval_tokens", "ollama_eval_tokens_total", "Generated tokens"),
+            ("prompt_tokens", "ollama_prompt_eval_tokens_total", "Prompt tokens evaluated"),
+            ("eval_seconds", "ollama_eval_seconds_total", "Time spent generating"),
+            ("prompt_eval_seconds", "ollama_prompt_eval_seconds_total", "Time spent evaluating prompts"),
+            ("load_seconds", "ollama_load_seconds_total", "Time spent loading models"),
+            ("early_stops", "ollama_early_stops_total", "Generations cut short by the generation budget"),
+        )
+        # complete="false" series hold locally measured estimates
+        lines = []
+        for key, name, help_text in counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (app, model, complete), s in self._series.items():
+                lines.append(f'{name}{{app="{app}",model="{model}",complete="{complete}"}} {s[key]}')
+        name = "ollama_time_to_first_token_seconds"
+        lines += [f"# HELP {name} Time from request to first streamed token", f"# TYPE {name} histogram"]
+        for (app, model, complete), s in self._series.items():
+            labels = f'app="{app}",model="{model}",complete="{complete}"'
+            for bound, count in zip(TTFT_BUCKETS, s["ttft_buckets"]):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {s["ttft_count"]}')
+            lines.append(f"{name}_sum{{{labels}}} {s['ttft_sum']}")
+            lines.append(f"{name}_count{{{labels}}} {s['ttft_count']}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int):
+        if self._server is not None:
+            return
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with sink._lock:
+                    body = sink._render().encode("utf-8")
+                self.send_response(200 if self.path == "/metrics" else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError:
+            return  # another app on this host already exports the endpoint
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+
+ModelInfo = namedtuple("ModelInfo", "name size parameter_size quantization context_length")
+
+
+def _format_size(size):
+    gb = size / 1024 ** 3
+    return f"{gb:.1f} GB" if gb >= 1 else f"{size / 1024 ** 2:.0f} MB"
+
+
+# Process-wide view of the models installed across the router's nodes.
+# Reads never block on Ollama once the first listing is in; stale entries
+# are refreshed in a background thread, and selected models are preloaded
+# (on the node the router picks) with a keep_alive policy.
+# slot() is held around each preload, e.g. a background scheduler slot.
+class ModelCatalog:
+    def __init__(self, router, ttl: float = 30.0, keep_alive="30m", slot=nullcontext):
+        self.router = router
+        self.ttl = ttl
+        self.keep_alive = keep_alive
+        self.slot = slot
+        self._lock = threading.Lock()
+        self._models = []
+        self._resident = set()
+        self._context_lengths = {}
+        self._fetched = 0.0
+        self._refreshing = False
+        self._warming = set()
+
+    def models(self):
+        if not self._fetched:
+            self.refresh()
+        elif time.monotonic() - self._fetched > self.ttl:
+            self._refresh_in_background()
+        return list(self._models)
+
+    def get(self, name):
+        return next((m for m in self._models if m.name == name), None)
+
+    def resident(self):
+        return set(self._resident)
+
+    def refresh(self):
+        # The union of every reachable node's /api/tags; a model installed
+        # on several nodes is described by the first one listing it
+        models, listed = [], False
+        for ep in self.router.endpoints:
+            try:
+                listing = ep.client.list()
+            except Exception:
+                continue
+            listed = True
+            for m in listing.models or []:
+                if any(info.name == m.model for info in models):
+                    continue
+                details = m.details
+                models.append(ModelInfo(
+                    name=m.model,
+                    size=_format_size(m.size or 0),
+                    parameter_size=details.parameter_size if details else None,
+                    quantization=details.quantization_level if details else None,
+                    context_length=self._context_length(ep.client, m.model, m.digest),
+                ))
+        if not listed:
+            # Keep serving the last good listing; retry after another TTL
+            self._fetched = time.monotonic()
+            return
+        # Resident models come from the router's own /api/ps polling
+        self.router.refresh(wait=True)
+        resident = set().union(*(models for _, _, _, models in self.router.status()))
+        with self._lock:
+            self._models = models
+            self._resident = resident
+            self._fetched = time.monotonic()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _context_length(self, client, name, digest):
+        # Model metadata only changes with the digest, so `show` runs once per build
+        if digest in self._context_lengths:
+            return self._context_lengths[digest]
+        length = None
+        try:
+            info = client.show(name).modelinfo or {}
+            length = next((v for k, v in info.items() if k.endswith(".context_length")), None)
+        except Exception:
+            pass
+        self._context_lengths[digest] = length
+        return length
+
+    def warm(self, model):
+        with self._lock:
+            if model in self._resident or model in self._warming:
+                return
+            self._warming.add(model)
+
+        def run():
+            try:
+                # An empty prompt just loads the weights and sets the keep_alive
+                with self.slot():
+                    self.router.call(model, lambda ep: ep.client.generate(model=model, prompt="", keep_alive=self.keep_alive))
+                with self._lock:
+                    self._resident.add(model)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._warming.discard(model)
+
+        threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,91 @@
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+_worker_doc = None
+
+
+def _open(data: bytes):
+    import fitz  # PyMuPDF, only needed once something is actually parsed
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def _init_worker(data: bytes):
+    # Each worker opens its own copy of the document once and keeps it
+    global _worker_doc
+    _worker_doc = _open(data)
+
+
+def _extract_range(start: int, stop: int):
+    return [_worker_doc[i].get_text() for i in range(start, stop)]
+
+
+def iter_pdf_pages(data: bytes, workers: int = 4, shard_pages: int = 16, parallel_from: int = 64):
+    # Yields (pages_done, total, text) in page order. Large documents are
+    # sharded across a process pool with at most two shards per worker in
+    # flight, so finished pages stream out without piling up in memory.
+    with _open(data) as doc:
+        total = doc.page_count
+        if workers <= 1 or total < parallel_from:
+            for i in range(total):
+                yield i + 1, total, doc[i].get_text()
+            return
+
+    shards = deque((i, min(i + shard_pages, total)) for i in range(0, total, shard_pages))
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(data,)) as pool:
+        pending = deque()
+        while shards and len(pending) < workers * 2:
+            pending.append(pool.submit(_extract_range, *shards.popleft()))
+        done = 0
+        while pending:
+            pages = pending.popleft().result()
+            if shards:
+                pending.append(pool.submit(_extract_range, *shards.popleft()))
+            for text in pages:
+                done += 1
+                yield done, total, text
+
+
+# Parsed PDF pages keyed by the SHA-256 of the upload: an in-memory LRU with
+# an optional on-disk tier that survives restarts.
+class PdfPageCache:
+    def __init__(self, max_items: int = 16, disk_dir=None):
+        self.max_items = max_items
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str):
+        with self._lock:
+            if digest in self._items:
+                self._items.move_to_end(digest)
+                return self._items[digest]
+        if self.disk_dir:
+            path = self.disk_dir / f"{digest}.json"
+            if path.exists():
+                pages = json.loads(path.read_text(encoding="utf-8"))
+                self._remember(digest, pages)
+                return pages
+        return None
+
+    def put(self, digest: str, pages):
+        self._remember(digest, pages)
+        if self.disk_dir:
+            path = self.disk_dir / f"{digest}.json"
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(pages), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def _remember(self, digest: str, pages):
+        with self._lock:
+            self._items[digest] = pages
+            self._items.move_to_end(digest)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
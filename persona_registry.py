@@ -0,0 +1,181 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+try:
+    import yaml
+    YAML_OK = True
+except ImportError:
+    YAML_OK = False
+
+PERSONA_SUFFIXES = (".json", ".yaml", ".yml")
+
+# Only name and aliases are kept in the index; prompt bodies are read on demand
+PersonaEntry = namedtuple("PersonaEntry", "name title aliases path mtime")
+
+
+def _read_file(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        if not YAML_OK:
+            raise ImportError("PyYAML not installed. Run: pip install pyyaml")
+        return yaml.safe_load(f)
+
+
+def _valid_persona(data):
+    # Empty or half-written files parse to None, a list or odd types
+    if not isinstance(data, dict):
+        return False
+    for key in ("name", "title", "prompt"):
+        if data.get(key) is not None and not isinstance(data[key], str):
+            return False
+    aliases = data.get("aliases", ())
+    return isinstance(aliases, (list, tuple)) and all(isinstance(a, str) for a in aliases)
+
+
+def _normalize(phrase):
+    return " ".join(phrase.lower().split())
+
+
+def _trie_pattern(node):
+    # Turn a character trie into one regex so alternatives sharing a prefix
+    # are only tried once per position.
+    alts = []
+    optional = False
+    for ch, child in sorted(node.items()):
+        if ch == "":
+            optional = True
+            continue
+        token = r"\s+" if ch == " " else re.escape(ch)
+        alts.append(token + _trie_pattern(child))
+    if not alts:
+        return ""
+    pattern = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+    if optional:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+def compile_matcher(phrases):
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    if not trie:
+        return None
+    return re.compile(r"(?<!\w)" + _trie_pattern(trie) + r"(?!\w)", re.IGNORECASE)
+
+
+class PersonaRegistry:
+    def __init__(self, directory, reload_interval=2.0, prompt_cache_size=256):
+        self.directory = str(directory)
+        self.reload_interval = reload_interval
+        self.prompt_cache_size = prompt_cache_size
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked = 0.0
+        self._files = {}
+        self._personas = {}
+        self._index = (None, {})
+        self._prompts = OrderedDict()
+        self.refresh(force=True)
+
+    def __len__(self):
+        return len(self._personas)
+
+    def __contains__(self, name):
+        return name in self._personas
+
+    def __iter__(self):
+        return iter(list(self._personas))
+
+    def _scan(self):
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return ()
+        signature = []
+        with entries:
+            for e in entries:
+                if e.is_file() and e.name.endswith(PERSONA_SUFFIXES):
+                    stat = e.stat()
+                    signature.append((e.path, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(signature))
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked < self.reload_interval:
+            return False
+        with self._lock:
+            self._checked = now
+            signature = self._scan()
+            if signature == self._signature:
+                return False
+            self._rebuild(signature)
+            return True
+
+    def _rebuild(self, signature):
+        files = {}
+        for path, mtime, size in signature:
+            cached = self._files.get(path)
+            if cached and cached.mtime == (mtime, size):
+                files[path] = cached
+                continue
+            try:
+                data = _read_file(path)
+            except Exception:
+                continue
+            if not _valid_persona(data):
+                continue
+            stem = os.path.splitext(os.path.basename(path))[0]
+            name = _normalize(data.get("name") or stem.replace("_", " "))
+            aliases = tuple(_normalize(a) for a in data.get("aliases", ()) if a)
+            files[path] = PersonaEntry(name, data.get("title") or name.title(), aliases, path, (mtime, size))
+
+        personas = {}
+        alias_map = {}
+        for entry in files.values():
+            personas[entry.name] = entry
+            for phrase in (entry.name,) + entry.aliases:
+                alias_map.setdefault(phrase, entry.name)
+
+        # Publish matcher and alias map together so readers never mix versions
+        self._index = (compile_matcher(alias_map), alias_map)
+        self._files = files
+        self._personas = personas
+        self._signature = signature
+        self._prompts.clear()
+
+    def detect(self, text):
+        self.refresh()
+        matcher, aliases = self._index
+        if matcher is None:
+            return None
+        match = matcher.search(text)
+        if match is None:
+            return None
+        return aliases.get(_normalize(match.group(0)))
+
+    def title(self, name):
+        entry = self._personas.get(name)
+        return entry.title if entry else name.title()
+
+    def prompt(self, name):
+        entry = self._personas[name]
+        key = (entry.path, entry.mtime)
+        with self._lock:
+            if key in self._prompts:
+                self._prompts.move_to_end(key)
+                return self._prompts[key]
+        body = _read_file(entry.path).get("prompt", "")
+        with self._lock:
+            self._prompts[key] = body
+            while len(self._prompts) > self.prompt_cache_size:
+                self._prompts.popitem(last=False)
+        return body
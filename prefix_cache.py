@@ -0,0 +1,62 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Ollama `context` tokens for a persona's system prefix, one entry per
+# (model, prompt text). warm(model, prompt) evaluates the prefix once and
+# returns its context; new conversations start from that context, so the
+# node only has to process the first user message. Keying on the model and
+# the prompt text means a model change or an edited persona gets a fresh
+# entry. Bounded LRU; warms run on a small background pool and concurrent
+# requests for the same prefix share one warm.
+class PrefixCache:
+    def __init__(self, warm, max_items: int = 32, workers: int = 1):
+        self.warm = warm
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="prefix-warm")
+
+    @staticmethod
+    def key(model: str, prompt: str):
+        return model, hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+    def peek(self, model: str, prompt: str):
+        key = self.key(model, prompt)
+        with self._lock:
+            context = self._items.get(key)
+            if context is not None:
+                self._items.move_to_end(key)
+            return context
+
+    def prefetch(self, model: str, prompt: str):
+        # Starts a background warm unless one is cached or running; returns
+        # its Future, or None when the context is already cached
+        key = self.key(model, prompt)
+        with self._lock:
+            if key in self._items:
+                return None
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._pool.submit(self._warm, key, model, prompt)
+            return future
+
+    def _warm(self, key, model: str, prompt: str):
+        try:
+            context = self.warm(model, prompt)
+        except Exception:
+            context = None
+        with self._lock:
+            self._pending.pop(key, None)
+            if context:
+                self._items[key] = context
+                self._items.move_to_end(key)
+                while len(self._items) > self.max_items:
+                    self._items.popitem(last=False)
+        return context
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+# One upstream generation shared by every session that asked for the same
+# key while it was running. The producer runs on its own thread, so a
+# subscriber navigating away doesn't cut the reply short for the others;
+# once the last subscriber has left, the flight is abandoned and the
+# producer stops.
+class _Flight:
+    def __init__(self):
+        self.chunks = []
+        self.final = {}
+        self.finished = False
+        self.abandoned = False
+        self.subscribers = 0
+        self._cond = threading.Condition()
+
+    def join(self) -> bool:
+        # Registers a subscriber; False once the flight has been abandoned
+        with self._cond:
+            if self.abandoned:
+                return False
+            self.subscribers += 1
+            return True
+
+    def push(self, delta: str):
+        with self._cond:
+            self.chunks.append(delta)
+            self._cond.notify_all()
+
+    def finish(self, final: dict):
+        with self._cond:
+            self.final = final
+            self.finished = True
+            self._cond.notify_all()
+
+    def subscribe(self):
+        # Call join() first; leaving early (close()) counts as leaving
+        seen = 0
+        try:
+            while True:
+                with self._cond:
+                    while seen >= len(self.chunks) and not self.finished:
+                        self._cond.wait()
+                    new = self.chunks[seen:]
+                    finished = self.finished
+                seen += len(new)
+                yield from new
+                if finished and seen >= len(self.chunks):
+                    return
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+                if not self.subscribers and not self.finished:
+                    self.abandoned = True
+
+
+# Finished replies keyed by a fingerprint of everything that shapes the
+# output (model, full message list, options). In-memory LRU with a TTL,
+# plus an optional JSON file per entry on disk. Hits are replayed as the
+# original chunks so callers keep their streaming path.
+class ResponseCache:
+    def __init__(self, max_items: int = 256, ttl: float = 3600.0, disk_dir=None, clock=time.time):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._items = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, messages, options=None) -> str:
+        raw = json.dumps([model, messages, options or {}], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _fresh(self, entry) -> bool:
+        return self.clock() - entry["created"] <= self.ttl
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                if self._fresh(entry):
+                    self._items.move_to_end(key)
+                    return entry
+                del self._items[key]
+        if self.disk_dir:
+            path = self.disk_dir / f"{key}.json"
+            if path.exists():
+                entry = json.loads(path.read_text(encoding="utf-8"))
+                if self._fresh(entry):
+                    self._remember(key, entry)
+                    return entry
+                path.unlink(missing_ok=True)
+        return None
+
+    def put(self, key: str, chunks, final: dict):
+        entry = {"created": self.clock(), "chunks": list(chunks), "final": final}
+        self._remember(key, entry)
+        if self.disk_dir:
+            path = self.disk_dir / f"{key}.json"
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entry), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def _remember(self, key: str, entry):
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def stream(self, key: str, produce, done: dict = None):
+        # produce(final) must yield text deltas and fill `final` with the
+        # closing stats; replies that never fill it (errors) aren't cached.
+        # The session that starts a generation gets its stats in `done`;
+        # cache hits and joined requests get done["cached"] instead.
+        entry = self.get(key)
+        if entry is not None:
+            if done is not None:
+                done["cached"] = True
+            yield from entry["chunks"]
+            return
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None or not flight.join()
+            if leader:
+                flight = self._flights[key] = _Flight()
+                flight.join()
+                threading.Thread(target=self._run, args=(key, flight, produce), daemon=True).start()
+        yield from flight.subscribe()
+        if done is not None:
+            if leader:
+                done.update(flight.final)
+            else:
+                done["cached"] = True
+
+    def _run(self, key: str, flight: _Flight, produce):
+        final = {}
+        try:
+            stream = produce(final)
+            for delta in stream:
+                flight.push(delta)
+                if flight.abandoned:
+                    # Nobody is listening: closing the stream drops the
+                    # upstream request, and the partial reply isn't cached
+                    close = getattr(stream, "close", None)
+                    if close:
+                        close()
+                    final = {}
+                    break
+        except Exception:
+            final = {}
+        finally:
+            # Cache before retiring the flight so a new request finds one or the other
+            if final:
+                self.put(key, flight.chunks, final)
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(final)
@@ -0,0 +1,102 @@
+import re
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting prompts
+    return len(text) // 4 + 1
+
+
+def chunk_pages(pages, chunk_words: int = 220, overlap: int = 40):
+    # Streams overlapping word chunks from an iterable of page texts, so
+    # indexing can begin before the last page has been extracted
+    step = max(chunk_words - overlap, 1)
+    words = []
+    emitted = False
+    for page in pages:
+        words.extend(page.split())
+        while len(words) >= chunk_words:
+            yield " ".join(words[:chunk_words])
+            emitted = True
+            del words[:step]
+    if len(words) > overlap or not emitted:
+        yield " ".join(words)
+
+
+def chunk_text(text: str, chunk_words: int = 220, overlap: int = 40):
+    return list(chunk_pages([text], chunk_words, overlap))
+
+
+# Okapi BM25 over a fixed list of chunks. Postings are stored as flat NumPy
+# arrays sorted by term, so a query touches only the chunks containing
+# its terms.
+class BM25Index:
+    def __init__(self, chunks, k1: float = 1.5, b: float = 0.75):
+        self.chunks = list(chunks)
+        n_docs = max(len(self.chunks), 1)
+        vocab = {}
+        term_ids = []
+        doc_ids = []
+        for i, chunk in enumerate(self.chunks):
+            tokens = tokenize(chunk)
+            term_ids.extend(vocab.setdefault(t, len(vocab)) for t in tokens)
+            doc_ids.extend([i] * len(tokens))
+        self.vocab = vocab
+
+        terms = np.asarray(term_ids, dtype=np.int64)
+        docs = np.asarray(doc_ids, dtype=np.int64)
+        keys, tf = np.unique(terms * n_docs + docs, return_counts=True)
+        post_terms = keys // n_docs
+        self._docs = keys % n_docs
+        self._offsets = np.searchsorted(post_terms, np.arange(len(vocab) + 1))
+
+        doc_len = np.bincount(docs, minlength=n_docs).astype(np.float32)
+        avg_len = doc_len.mean() or 1.0
+        df = np.diff(self._offsets).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * doc_len[self._docs] / avg_len)
+        self._weights = (idf[post_terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def scores(self, query: str):
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term in set(tokenize(query)):
+            tid = self.vocab.get(term)
+            if tid is None:
+                continue
+            lo, hi = self._offsets[tid], self._offsets[tid + 1]
+            # Each chunk appears at most once per term, so plain fancy-index add is safe
+            scores[self._docs[lo:hi]] += self._weights[lo:hi]
+        return scores
+
+    def search(self, query: str, k: int = 4):
+        if not self.chunks:
+            return []
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def select(self, query: str, k: int = 4, token_budget: int = 1200):
+        # Best-scoring chunks that fit the budget, returned in document order.
+        # Questions that match nothing (e.g. "summarize") get the opening chunks.
+        hits = [i for i, _ in self.search(query, k)] or list(range(min(k, len(self.chunks))))
+        picked = []
+        used = 0
+        for i in hits:
+            cost = estimate_tokens(self.chunks[i])
+            if used + cost > token_budget:
+                continue
+            picked.append(i)
+            used += cost
+        return [self.chunks[i] for i in sorted(picked)]
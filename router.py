@@ -0,0 +1,268 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+
+
+class NoHealthyEndpoint(ConnectionError):
+    pass
+
+
+def _model_key(name: str) -> str:
+    return name if ":" in name else f"{name}:latest"
+
+
+def _is_node_failure(exc) -> bool:
+    # 4xx answers (unknown model, bad request) are the request's fault and
+    # would fail on any node; everything else counts against the node
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code is None or code >= 500
+
+
+class Endpoint:
+    def __init__(self, url: str, client=None):
+        if "://" not in url:
+            url = f"http://{url}"
+        self.url = url.rstrip("/")
+        self.client = client
+        self.in_flight = 0
+        self.resident = set()
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_used = 0.0
+
+    def state(self, now: float, threshold: int) -> str:
+        if now < self.open_until:
+            return "open"
+        if self.failures >= threshold:
+            return "half-open"
+        return "failing" if self.failures else "ok"
+
+
+# Spreads requests over several Ollama nodes. /api/ps is polled to learn
+# which models each node has resident; a request goes to the least busy
+# available node that already holds the model, falling back to any
+# available node. Node failures before the first streamed chunk are
+# retried elsewhere with exponential backoff, and a node that fails
+# `failure_threshold` times in a row is skipped for `cooldown` seconds
+# (circuit breaker), then gets a single trial request.
+class Router:
+    def __init__(self, urls, client_factory=None, check_interval: float = 5.0, timeout: float = 2.0,
+                 retries: int = 2, backoff: float = 0.25, failure_threshold: int = 3,
+                 cooldown: float = 30.0, clock=time.monotonic):
+        self.endpoints = [Endpoint(u) for u in urls]
+        if client_factory:
+            for ep in self.endpoints:
+                ep.client = client_factory(ep.url)
+        self.check_interval = check_interval
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._checking = False
+        self._ready = threading.Event()
+
+    # ── Health ──
+    def _check(self, ep: Endpoint):
+        try:
+            with urllib.request.urlopen(f"{ep.url}/api/ps", timeout=self.timeout) as resp:
+                models = json.load(resp).get("models", [])
+            resident = {_model_key(m.get("name") or m.get("model", "")) for m in models}
+            with self._lock:
+                ep.resident = resident
+            self._succeed(ep)
+        except Exception:
+            self._fail(ep)
+
+    def refresh(self, wait: bool = False):
+        with self._lock:
+            if self._checking:
+                return
+            self._checking = True
+            self._checked_at = self.clock()
+        threads = [threading.Thread(target=self._check, args=(ep,), daemon=True) for ep in self.endpoints]
+        for t in threads:
+            t.start()
+
+        def finish():
+            for t in threads:
+                t.join()
+            with self._lock:
+                self._checking = False
+            self._ready.set()
+
+        if wait:
+            finish()
+        else:
+            threading.Thread(target=finish, daemon=True).start()
+
+    def _maybe_refresh(self):
+        # The first check blocks every caller; later ones run in the background
+        if self._checked_at is None:
+            self.refresh(wait=True)
+        elif self.clock() - self._checked_at >= self.check_interval:
+            self.refresh()
+        self._ready.wait(self.timeout + 1)
+
+    def _succeed(self, ep: Endpoint):
+        with self._lock:
+            ep.failures = 0
+            ep.open_until = 0.0
+
+    def _fail(self, ep: Endpoint):
+        with self._lock:
+            ep.failures += 1
+            if ep.failures >= self.failure_threshold:
+                ep.open_until = self.clock() + self.cooldown
+
+    # ── Selection ──
+    def pick(self, model: str, exclude=(), reserve: bool = True) -> Endpoint:
+        # reserve=False only peeks: no in-flight count, no half-open trial
+        self._maybe_refresh()
+        key = _model_key(model)
+        with self._lock:
+            now = self.clock()
+            available = [ep for ep in self.endpoints if now >= ep.open_until]
+            if not available:
+                raise NoHealthyEndpoint(f"No Ollama node available ({self._describe(now)})")
+            # Only skip nodes that already failed this request if others remain
+            candidates = [ep for ep in available if ep.url not in exclude] or available
+            # Healthy before failing, model resident before cold, then least busy
+            ep = min(candidates, key=lambda e: (e.failures > 0, key not in e.resident, e.in_flight, e.last_used))
+            if not reserve:
+                return ep
+            if ep.failures >= self.failure_threshold:
+                # Half-open: this request is the trial, everyone else keeps away
+                ep.open_until = now + self.cooldown
+            ep.in_flight += 1
+            ep.last_used = now
+            return ep
+
+    def _done(self, ep: Endpoint, model: str, ok: bool):
+        with self._lock:
+            ep.in_flight -= 1
+            if ok:
+                ep.resident.add(_model_key(model))
+
+    def _retry_delay(self, ep: Endpoint, exc, attempt: int):
+        # Records the failure; the backoff before trying again, or None
+        # when the request shouldn't be retried
+        if not _is_node_failure(exc):
+            self._succeed(ep)  # the node answered; the request itself was bad
+            return None
+        self._fail(ep)
+        if attempt >= self.retries:
+            return None
+        return self.backoff * 2 ** attempt
+
+    def _retry(self, ep: Endpoint, exc, attempt: int) -> bool:
+        delay = self._retry_delay(ep, exc, attempt)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    # ── Requests ──
+    def call(self, model: str, fn):
+        # fn(endpoint) -> result, retried on another node if the node fails
+        tried = []
+        for attempt in range(self.retries + 1):
+            ep = self.pick(model, tried)
+            try:
+                result = fn(ep)
+            except Exception as e:
+                self._done(ep, model, False)
+                tried.append(ep.url)
+                if self._retry(ep, e, attempt):
+                    continue
+                raise
+            self._done(ep, model, True)
+            self._succeed(ep)
+            return result
+
+    def stream(self, model: str, open_stream):
+        # open_stream(endpoint) -> iterator of chunks. Retries only happen
+        # before the first chunk; after that a failure is the caller's.
+        tried = []
+        for attempt in range(self.retries + 1):
+            ep = self.pick(model, tried)
+            chunks = None
+            ok = False
+            try:
+                try:
+                    chunks = iter(open_stream(ep))
+                    first = next(chunks)
+                except StopIteration:
+                    ok = True
+                    self._succeed(ep)
+                    return
+                except Exception as e:
+                    tried.append(ep.url)
+                    if self._retry(ep, e, attempt):
+                        continue
+                    raise
+                self._succeed(ep)
+                yield first
+                yield from chunks
+                ok = True
+                return
+            finally:
+                close = getattr(chunks, "close", None)
+                if close:
+                    close()
+                self._done(ep, model, ok)
+
+    async def astream(self, model: str, open_stream):
+        # Async twin of stream(): `await open_stream(endpoint)` gives an
+        # async iterator of chunks. Node selection itself is synchronous.
+        tried = []
+        for attempt in range(self.retries + 1):
+            ep = self.pick(model, tried)
+            chunks = None
+            ok = False
+            try:
+                try:
+                    chunks = await open_stream(ep)
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    ok = True
+                    self._succeed(ep)
+                    return
+                except Exception as e:
+                    tried.append(ep.url)
+                    delay = self._retry_delay(ep, e, attempt)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    continue
+                self._succeed(ep)
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+                ok = True
+                return
+            finally:
+                close = getattr(chunks, "aclose", None)
+                if close:
+                    await close()
+                self._done(ep, model, ok)
+
+    # ── Status ──
+    def _describe(self, now: float) -> str:
+        return ", ".join(f"{ep.url} {ep.state(now, self.failure_threshold)}" for ep in self.endpoints)
+
+    def status(self):
+        # [(url, state, in_flight, resident models)] for display
+        with self._lock:
+            now = self.clock()
+            return [
+                (ep.url, ep.state(now, self.failure_threshold), ep.in_flight, sorted(ep.resident))
+                for ep in self.endpoints
+            ]
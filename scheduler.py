@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Session id for work no user is waiting on (warm-ups, summaries)
+BACKGROUND_SESSION = "__background__"
+
+
+class Ticket:
+    def __init__(self, session_id: str, cost: int = 1, background: bool = False):
+        self.session_id = session_id
+        self.cost = cost
+        self.background = background
+        self.admitted = False
+        self.cancelled = False
+        self.queued_s = 0.0
+
+    def guard(self, stream):
+        # Passes the stream through until the ticket is cancelled, then
+        # closes it so the upstream request is dropped too
+        try:
+            for item in stream:
+                yield item
+                if self.cancelled:
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+
+
+# Process-wide admission control for generations. At most max_concurrent
+# slots are in use; waiting sessions are served round-robin (one ticket per
+# session per turn) so a busy session can't starve the others. A new
+# submission from a session cancels whatever that session had queued or
+# running. Background tickets (warm-ups, summaries) only get a slot while
+# no foreground ticket is waiting, and never supersede one another.
+class Scheduler:
+    def __init__(self, max_concurrent: int = 2):
+        self.max_concurrent = max_concurrent
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()
+        self._background = OrderedDict()
+        self._running = set()
+        self._load = 0
+
+    def submit(self, session_id: str, cost: int = 1, supersede: bool = True, background: bool = False) -> Ticket:
+        with self._cond:
+            if supersede and not background:
+                self._cancel(session_id)
+            ticket = Ticket(session_id, max(1, min(cost, self.max_concurrent)), background)
+            queues = self._background if background else self._queues
+            queues.setdefault(session_id, deque()).append(ticket)
+            self._dispatch()
+            return ticket
+
+    def cancel(self, session_id: str):
+        with self._cond:
+            self._cancel(session_id)
+            self._dispatch()
+
+    def _cancel(self, session_id: str):
+        for ticket in self._queues.pop(session_id, ()):
+            ticket.cancelled = True
+        for ticket in self._running:
+            if ticket.session_id == session_id:
+                ticket.cancelled = True
+
+    def _dispatch(self):
+        while self._queues or self._background:
+            queues = self._queues or self._background
+            session_id, queue = next(iter(queues.items()))
+            ticket = queue[0]
+            if self._load + ticket.cost > self.max_concurrent:
+                break
+            queue.popleft()
+            # The session goes to the back of the line for its next ticket
+            del queues[session_id]
+            if queue:
+                queues[session_id] = queue
+            ticket.admitted = True
+            self._running.add(ticket)
+            self._load += ticket.cost
+        self._cond.notify_all()
+
+    def wait(self, ticket: Ticket, timeout: float = None) -> bool:
+        with self._cond:
+            self._cond.wait_for(lambda: ticket.admitted or ticket.cancelled, timeout)
+            return ticket.admitted and not ticket.cancelled
+
+    def release(self, ticket: Ticket):
+        with self._cond:
+            if ticket in self._running:
+                self._running.discard(ticket)
+                self._load -= ticket.cost
+            else:
+                queues = self._background if ticket.background else self._queues
+                queue = queues.get(ticket.session_id)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del queues[ticket.session_id]
+            self._dispatch()
+
+    def position(self, ticket: Ticket) -> int:
+        # 0 once admitted, otherwise the 1-based place in dispatch order
+        with self._cond:
+            if ticket.admitted:
+                return 0
+            order = []
+            for group in (self._queues, self._background):
+                queues = [list(q) for q in group.values()]
+                for depth in range(max((len(q) for q in queues), default=0)):
+                    order += [q[depth] for q in queues if depth < len(q)]
+            return order.index(ticket) + 1 if ticket in order else 0
+
+    def status(self):
+        # (slots in use, tickets waiting)
+        with self._cond:
+            waiting = sum(len(q) for q in self._queues.values())
+            return self._load, waiting + sum(len(q) for q in self._background.values())
+
+    @contextmanager
+    def slot(self, session_id: str, cost: int = 1, on_wait=None, poll: float = 0.25, background: bool = False):
+        # Holds a slot for the body of the with-block; on_wait(position) is
+        # called while queued. Check ticket.cancelled before doing work.
+        ticket = self.submit(session_id, cost, background=background)
+        started = time.monotonic()
+        try:
+            while not self.wait(ticket, poll) and not ticket.cancelled:
+                if on_wait:
+                    on_wait(self.position(ticket))
+            ticket.queued_s = round(time.monotonic() - started, 4)
+            yield ticket
+        finally:
+            self.release(ticket)
@@ -0,0 +1,179 @@
+import re
+import time
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+BEFORE, THINKING, ANSWERING = range(3)
+
+
+def _partial_tag(buf: str, tag: str) -> int:
+    # Length of the longest suffix of buf that could be the start of tag
+    for k in range(min(len(tag) - 1, len(buf)), 0, -1):
+        if buf.endswith(tag[:k]):
+            return k
+    return 0
+
+
+# Splits a streamed reply into think/answer as deltas arrive, scanning each
+# delta once instead of re-parsing the accumulated text.
+class ThinkStreamParser:
+    def __init__(self, tail: int = 600):
+        self.state = BEFORE
+        self.tail = tail
+        self._raw = []
+        self._before = []
+        self._think = []
+        self._answer = []
+        self._pending = ""
+        self._think_tail = ""
+
+    def feed(self, delta: str) -> str:
+        # Returns the answer text this delta added
+        self._raw.append(delta)
+        buf = self._pending + delta
+        self._pending = ""
+        answered = ""
+        while buf:
+            if self.state == ANSWERING:
+                self._answer.append(buf)
+                answered += buf
+                break
+            tag = THINK_OPEN if self.state == BEFORE else THINK_CLOSE
+            idx = buf.find(tag)
+            if idx < 0:
+                # Hold back a possible split tag until the next delta arrives
+                keep = _partial_tag(buf, tag)
+                self._pending = buf[len(buf) - keep:]
+                self._emit(buf[:len(buf) - keep])
+                break
+            self._emit(buf[:idx])
+            buf = buf[idx + len(tag):]
+            self.state += 1
+        return answered
+
+    def _emit(self, text: str):
+        if not text:
+            return
+        if self.state == BEFORE:
+            self._before.append(text)
+        else:
+            self._think.append(text)
+            self._think_tail = (self._think_tail + text)[-self.tail:]
+
+    @property
+    def text(self) -> str:
+        return "".join(self._raw)
+
+    @property
+    def think(self) -> str:
+        return "".join(self._think)
+
+    @property
+    def think_tail(self) -> str:
+        return self._think_tail
+
+    @property
+    def answer(self) -> str:
+        # Models that skip the <think> block answer in plain text
+        if self.state == BEFORE:
+            return "".join(self._before)
+        return "".join(self._answer)
+
+    def result(self):
+        # Same split as the old full-text parse; tests/test_parser_equivalence.py
+        # keeps that function as the reference
+        if self.state == ANSWERING:
+            return self.think.strip(), "".join(self._answer).strip()
+        return "", self.text
+
+
+_ANSWER_END = re.compile(r"[\s.!?。！？]$")
+
+
+# Decides when a streamed reply has said enough: once the answer after
+# </think> holds `answer_words` complete words, or once the think trace
+# runs past `think_tokens` chunks (Ollama streams about one token per
+# chunk). feed() passes each delta through, trimmed at the cut; after
+# that the caller should close the upstream stream.
+class GenerationBudget:
+    def __init__(self, answer_words: int = 4, think_tokens: int = None, max_tokens: int = None):
+        self.answer_words = answer_words
+        self.think_tokens = think_tokens
+        self.max_tokens = max_tokens
+        self.parser = ThinkStreamParser()
+        self.tokens = 0
+        self.think_used = 0
+        self.stop_reason = None
+        if answer_words:
+            self._first_words = re.compile(r"\s*(?:\S+\s+){%d}\S+" % (answer_words - 1))
+
+    def feed(self, delta: str) -> str:
+        if self.stop_reason:
+            return ""
+        self.tokens += 1
+        self.parser.feed(delta)
+        if self.parser.state == THINKING:
+            self.think_used += 1
+            if self.think_tokens and self.think_used > self.think_tokens:
+                self.stop_reason = "think_budget"
+        elif self.parser.state == ANSWERING and self.answer_words:
+            answer = self.parser.answer
+            words = len(answer.split())
+            # The last word only counts once something follows it
+            if words > self.answer_words or (words == self.answer_words and _ANSWER_END.search(answer)):
+                self.stop_reason = "answer"
+                excess = len(answer) - self._first_words.match(answer).end()
+                return delta[:max(len(delta) - excess, 0)]
+        return delta
+
+    def stats(self) -> dict:
+        # The num_predict cap minus what was generated: an upper bound on
+        # what the early stop spared, not an estimate of it
+        headroom = 0
+        if self.stop_reason and self.max_tokens:
+            headroom = max(self.max_tokens - self.tokens, 0)
+        return {"stop_reason": self.stop_reason, "num_predict_headroom": headroom}
+
+
+# Batches live UI updates: the latest state is rendered at most `hz` times a
+# second, or sooner once `max_chars` of new text has piled up.
+class RenderCoalescer:
+    def __init__(self, render, hz: float = 20.0, max_chars: int = 400, clock=time.monotonic):
+        self.render = render
+        self.interval = 1.0 / hz if hz else 0.0
+        self.max_chars = max_chars
+        self.clock = clock
+        self.updates = 0
+        self.renders = 0
+        self._state = None
+        self._dirty = False
+        self._chars = 0
+        self._last = float("-inf")
+
+    def update(self, *state, chars: int = 0):
+        self.updates += 1
+        self._state = state
+        self._dirty = True
+        self._chars += chars
+        due = self.clock() - self._last >= self.interval
+        if due or (self.max_chars and self._chars >= self.max_chars):
+            self.flush()
+
+    def flush(self):
+        if not self._dirty:
+            return
+        self.render(*self._state)
+        self.renders += 1
+        self._dirty = False
+        self._chars = 0
+        self._last = self.clock()
+
+    def close(self) -> int:
+        # The final state is always rendered, however recently we last drew
+        self.flush()
+        return self.saved
+
+    @property
+    def saved(self) -> int:
+        return self.updates - self.renders
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+# The apps' modules live at the repository root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_ollama import MockOllama  # noqa: E402
+
+
+@pytest.fixture
+def ollama_server():
+    server = MockOllama()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def app(request, ollama_server, tmp_path, monkeypatch):
+    # One of the apps under AppTest, pointed at the mock server and a
+    # scratch data directory. Pick the script by parametrizing indirectly:
+    #     pytestmark = pytest.mark.parametrize("app", ["jarvisui.py"], indirect=True)
+    monkeypatch.setenv("OLLAMA_HOSTS", ollama_server.url)
+    monkeypatch.setenv("JARGONBOT_DB", str(tmp_path / "conversations.sqlite3"))
+    monkeypatch.setenv("JARGONBOT_METRICS", str(tmp_path / "metrics"))
+    # Router, store and caches are process-wide; start from a clean slate
+    st.cache_resource.clear()
+    at = AppTest.from_file(str(ROOT / request.param), default_timeout=30)
+    at.run()
+    yield at
+    st.cache_resource.clear()
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# A small stand-in for the Ollama REST API, enough for the apps' request
+# paths: /api/ps, /api/tags, /api/embed, /api/generate (with `context`)
+# and /api/chat, streamed or not. Every POST body is kept in `requests` for assertions;
+# streams the client hung up on are counted in `dropped`.
+class MockOllama:
+    def __init__(self, words=("Hello ", "there ", "friend."), delay: float = 0.0, models=("gemma3:latest",)):
+        self.words = list(words)
+        self.delay = delay
+        self.models = list(models)
+        self.requests = []
+        self.raw_sizes = []
+        self.dropped = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def posts(self, path: str):
+        return [body for p, body in self.requests if p == path]
+
+    def _reply(self, path: str, req: dict):
+        words = self.words
+        num_predict = req.get("options", {}).get("num_predict")
+        if num_predict is not None:
+            words = words[:num_predict]
+        prompt_tokens = len(json.dumps(req.get("messages") or req.get("prompt", ""))) // 4
+        final = {
+            "model": req.get("model"), "done": True, "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens, "eval_count": len(words),
+            "prompt_eval_duration": 1000, "eval_duration": 5000, "load_duration": 10, "total_duration": 10000,
+        }
+        if path == "/api/generate":
+            # Stand-in tokens: one per 4 prompt characters, one per reply word
+            context = list(req.get("context") or [])
+            context += list(range(len(req.get("prompt", "")) // 4)) + list(range(len(words)))
+            final["context"] = context
+            chunks = [{"model": req.get("model"), "response": w, "done": False} for w in words]
+            final["response"] = ""
+        else:
+            chunks = [{"model": req.get("model"), "message": {"role": "assistant", "content": w}, "done": False} for w in words]
+            final["message"] = {"role": "assistant", "content": ""}
+        return chunks, final
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, obj, code=200):
+                body = json.dumps(obj).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/ps":
+                    return self._json({"models": [{"name": m, "model": m} for m in mock.models]})
+                if self.path == "/api/tags":
+                    return self._json({"models": [{"name": m, "model": m} for m in mock.models]})
+                self._json({}, 404)
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                req = json.loads(raw or b"{}")
+                mock.requests.append((self.path, req))
+                mock.raw_sizes.append((self.path, len(raw)))
+                if self.path == "/api/embed":
+                    # A stand-in vector per text: its length and a constant
+                    texts = req["input"] if isinstance(req["input"], list) else [req["input"]]
+                    return self._json({"model": req.get("model"), "embeddings": [[float(len(t)), 1.0] for t in texts]})
+                if self.path not in ("/api/generate", "/api/chat"):
+                    return self._json({}, 404)
+                chunks, final = mock._reply(self.path, req)
+                if req.get("stream", True) is False:
+                    text = "".join(c.get("response") or c["message"]["content"] for c in chunks)
+                    if "message" in final:
+                        final["message"]["content"] = text
+                    else:
+                        final["response"] = text
+                    time.sleep(mock.delay * len(chunks))
+                    return self._json(final)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for obj in chunks + [final]:
+                        body = (json.dumps(obj) + "\n").encode()
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+                        self.wfile.flush()
+                        time.sleep(mock.delay)
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    mock.dropped += 1
+
+        return Handler
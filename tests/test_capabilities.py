@@ -0,0 +1,43 @@
+import json
+
+from capabilities import Capabilities, StartupProfile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_total_is_frozen_once_the_cold_start_is_reported(tmp_path):
+    clock = FakeClock()
+    profile = StartupProfile(clock)
+    profile.preload("json")
+    clock.now = 0.5
+    profile.mark("page setup")
+    path = tmp_path / "startup.jsonl"
+    assert profile.finish(path)
+    assert profile.total() == 0.5
+
+    # Reruns go through the same marks and preloads
+    for _ in range(3):
+        clock.now += 1.0
+        profile.preload("json")
+        profile.mark("page setup")
+        profile.mark("chat render")
+        assert not profile.finish(path)
+    assert profile.total() == 0.5
+    assert profile.timings["page setup"] == 0.5
+    assert "chat render" not in profile.timings
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0])["total_s"] == 0.5
+
+
+def test_capabilities_probe_without_importing():
+    caps = Capabilities(present="json", missing="no_such_module_here")
+    assert caps.available("present")
+    assert not caps.available("missing")
+    assert caps.load("missing") is None
+    assert caps.load("present") is json
@@ -0,0 +1,82 @@
+import pytest
+import streamlit as st
+
+from prefix_cache import PrefixCache
+
+pytestmark = pytest.mark.parametrize("app", ["characterbot.py"], indirect=True)
+
+
+def blocking(prefetch):
+    # PrefixCache.prefetch that only returns once the warm is done
+    def run(self, model, prompt):
+        future = prefetch(self, model, prompt)
+        if future is not None:
+            future.result()
+        return future
+    return run
+
+
+def turn_requests(server):
+    # Chat turns only, not the persona prefix warm-ups
+    return [r for r in server.posts("/api/generate") if r.get("stream") is not False]
+
+
+def test_prompt_size_stays_flat_as_the_conversation_grows(app, ollama_server):
+    app.chat_input[0].set_value("Talk like Sherlock").run()
+    for i in range(15):
+        app.chat_input[0].set_value(f"Question {i}: what do you deduce from the mud on my boots?").run()
+        assert not app.exception
+
+    turns = turn_requests(ollama_server)
+    assert len(turns) == 16
+    sizes = [len(r["prompt"]) for r in turns[1:]]
+    # Every later turn sends only its own message, whatever the history length
+    assert max(sizes) - min(sizes) <= 2
+    assert all(r["prompt"].startswith("User: Question") for r in turns[1:])
+    # ...and continues from the context the previous reply returned
+    for previous, current in zip(turns, turns[1:]):
+        assert len(current["context"]) > len(previous.get("context") or [])
+    assert len(app.session_state.messages) == 32
+
+
+def restart(app):
+    # The prefix cache is process-wide and built on the first run; rebuild
+    # it so a patched PrefixCache.prefetch takes effect from the start
+    st.cache_resource.clear()
+    app.run()
+
+
+def switch_from_sherlock_to_naruto(app):
+    app.chat_input[0].set_value("Talk like Sherlock").run()
+    app.chat_input[0].set_value("Any clues?").run()
+    sherlock_session = app.session_state.session_id
+    app.chat_input[0].set_value("Now be Naruto").run()
+    assert app.session_state.current_character == "naruto"
+    assert app.session_state.session_id != sherlock_session
+
+
+def test_persona_switch_continues_from_the_warm_prefix(app, ollama_server, monkeypatch):
+    # Pre-warming finishes before the app goes on
+    monkeypatch.setattr(PrefixCache, "prefetch", blocking(PrefixCache.prefetch))
+    restart(app)
+    switch_from_sherlock_to_naruto(app)
+
+    last = turn_requests(ollama_server)[-1]
+    assert app.session_state.last_metrics["prefix"] == "warm"
+    assert "Any clues?" not in last["prompt"] and "Sherlock" not in last["prompt"]
+    # Continued from Naruto's pre-evaluated prefix, not Sherlock's conversation
+    primer = next(r for r in ollama_server.posts("/api/generate") if r.get("stream") is False and "Naruto" in r["prompt"])
+    assert len(last["context"]) == len(primer["prompt"]) // 4 + len(ollama_server.words)
+
+
+def test_persona_switch_without_a_prefix_rebuilds_the_prompt(app, ollama_server, monkeypatch):
+    # No prefix is ever warmed
+    monkeypatch.setattr(PrefixCache, "prefetch", lambda self, model, prompt: None)
+    restart(app)
+    switch_from_sherlock_to_naruto(app)
+
+    last = turn_requests(ollama_server)[-1]
+    assert app.session_state.last_metrics["prefix"] == "cold"
+    assert not last.get("context")
+    assert "Any clues?" not in last["prompt"] and "Sherlock" not in last["prompt"]
+    assert "Naruto Uzumaki" in last["prompt"]
@@ -0,0 +1,76 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from context_window import ContextWindow
+from message import Message
+from retrieval import estimate_tokens
+
+THINK = "Let me reason about this carefully. " * 140  # ~5 KB trace
+
+
+class InlinePool:
+    # Runs submitted work immediately, so summaries land on the next turn
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def assistant(i: int) -> Message:
+    answer = f"Answer {i}: " + "the details you asked for " * 6
+    return Message("assistant", f"<think>{THINK}</think>{answer}", THINK, answer)
+
+
+def prompt_tokens(summary, recent) -> int:
+    return (estimate_tokens(summary) if summary else 0) + sum(estimate_tokens(m["content"]) for m in recent)
+
+
+def test_500_turn_session_stays_within_budget():
+    calls = []
+
+    def summarize(previous, turns):
+        calls.append(len(turns))
+        return f"Summary of {sum(calls)} turns."
+
+    window = ContextWindow(budget=2000, pool=InlinePool())
+    history = []
+    for i in range(500):
+        history.append(Message("user", f"Question {i}: " + "tell me more about it " * 8))
+        summary, recent = window.build(history, summarize)
+        assert prompt_tokens(summary, recent) <= 2000
+        assert all(THINK not in m["content"] for m in recent)
+        assert recent[-1]["content"] == history[-1]["content"]
+        start = len(history) - len(recent)
+        history.append(assistant(i))
+        # Older turns are compacted the way jarvisui does it
+        if len(history) > 8:
+            history[-9].compact()
+
+    # Turns dropped from the window are folded into the summary, a batch
+    # (and a turn, while it is produced) behind at most
+    assert start - window.summary_upto <= window.batch + 2
+    assert sum(calls) == window.summary_upto
+    assert not any(m.compressed for m in history[-8:])
+
+
+def test_summary_is_picked_up_from_a_real_pool():
+    window = ContextWindow(budget=300, pool=ThreadPoolExecutor(1), batch=2)
+    history = []
+    for i in range(20):
+        history += [Message("user", f"Question {i}: " + "words " * 40), assistant(i)]
+    summary, _ = window.build(history, lambda previous, turns: "short summary")
+    # Not ready on the turn it's requested
+    assert summary == ""
+    window._future.result()
+    summary, recent = window.build(history, lambda previous, turns: "short summary")
+    assert summary == "short summary"
+    assert prompt_tokens(summary, recent) <= 300
+
+
+def test_shorter_history_resets_the_summary():
+    window = ContextWindow(budget=100, pool=InlinePool(), batch=1)
+    history = [Message("user", "x" * 200) for _ in range(10)]
+    window.build(history, lambda previous, turns: "old conversation")
+    window.build(history, lambda previous, turns: "old conversation")
+    assert window.summary == "old conversation"
+    summary, recent = window.build(history[:1], lambda previous, turns: "new")
+    assert summary == "" and window.summary_upto == 0
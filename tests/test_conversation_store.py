@@ -0,0 +1,39 @@
+from conversation_store import ConversationStore
+
+
+def test_pages_come_back_oldest_first(tmp_path):
+    store = ConversationStore(tmp_path / "c.sqlite3")
+    for i in range(120):
+        store.append("s", {"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"})
+    recent = store.load_recent("s", 50)
+    assert [m["content"] for m in recent] == [f"m{i}" for i in range(70, 120)]
+    older = store.load_before("s", recent[0]["seq"], 50)
+    assert [m["content"] for m in older] == [f"m{i}" for i in range(20, 70)]
+    assert len(store.load_before("s", older[0]["seq"], 50)) == 20
+    assert store.count("s") == 120 and store.count("other") == 0
+
+
+def test_history_and_meta_survive_a_restart(tmp_path):
+    path = tmp_path / "c.sqlite3"
+    store = ConversationStore(path)
+    store.append("s", {"role": "user", "content": "hi"})
+    store.append("s", {"role": "assistant", "content": "<think>x</think>yo", "think": "x", "answer": "yo"})
+    store.set_meta("s", "characterbot", character="sherlock")
+    store.flush()
+
+    reopened = ConversationStore(path)
+    assert reopened.load_recent("s") == [
+        {"seq": 0, "role": "user", "content": "hi"},
+        {"seq": 1, "role": "assistant", "content": "<think>x</think>yo", "think": "x", "answer": "yo"},
+    ]
+    assert reopened.get_meta("s") == {"character": "sherlock"}
+    # Sequence numbers carry on from what is stored
+    assert reopened.append("s", {"role": "user", "content": "again"}) == 2
+
+
+def test_clear_keeps_sequence_numbers_increasing(tmp_path):
+    store = ConversationStore(tmp_path / "c.sqlite3")
+    store.append("s", {"role": "user", "content": "a"})
+    store.clear("s")
+    assert store.load_recent("s") == []
+    assert store.append("s", {"role": "user", "content": "b"}) == 1
@@ -0,0 +1,96 @@
+import sys
+import threading
+from contextlib import contextmanager
+
+import pytest
+import streamlit as st
+
+from message import load_messages
+
+pytestmark = pytest.mark.parametrize("app", ["jarvisui.py"], indirect=True)
+
+
+@contextmanager
+def count_calls(name):
+    # The script redefines its functions on every rerun, so a patched
+    # attribute would not survive; count calls through the profiler instead
+    calls = []
+
+    def profile(frame, event, arg):
+        if event == "call" and frame.f_code.co_name == name and frame.f_code.co_filename.endswith("jarvisui.py"):
+            calls.append(frame.f_code)
+
+    sys.setprofile(profile)
+    threading.setprofile(profile)
+    try:
+        yield calls
+    finally:
+        threading.setprofile(None)
+        sys.setprofile(None)
+
+
+def history(n):
+    return load_messages(
+        [{"seq": i, "role": "user", "content": f"question {i}"} if i % 2 == 0 else
+         {"seq": i, "role": "assistant", "content": f"<think>t{i}</think>answer {i}", "think": f"t{i}", "answer": f"answer {i}"}
+         for i in range(n)],
+        keep_raw=8,
+    )
+
+
+def drawn(at):
+    return [m.value for m in at.markdown if "msg-row" in m.value]
+
+
+def test_only_the_newest_window_is_drawn(app):
+    app.session_state["messages"] = history(100)
+    app.run()
+    rows = drawn(app)
+    assert len(rows) == 40
+    assert "answer 99" in rows[-1] and "question 60" in rows[0]
+
+    next(b for b in app.button if "earlier" in b.label).click().run()
+    rows = drawn(app)
+    assert len(rows) == 80 and "question 20" in rows[0]
+
+
+def test_message_html_is_reused_across_reruns(app):
+    app.session_state["messages"] = history(10)
+    with count_calls("message_html") as first:
+        app.run()
+    assert len(first) == 10
+    with count_calls("message_html") as second:
+        app.run()
+    assert second == []
+    # Toggling the think boxes renders every message afresh
+    with count_calls("message_html") as toggled:
+        next(t for t in app.toggle if "Thinking" in t.label).set_value(False).run()
+    assert len(toggled) == 10
+
+
+def test_early_stop_records_local_estimates(app, ollama_server):
+    ollama_server.words = ["<think>", "hmm", "</think>", "Quantum ", "stateful ", "superposition ", "entanglement ", "and ", "rambling ", "on"]
+    app.text_area(key="chat_input").set_value("What is a qubit?")
+    next(b for b in app.button if "SEND" in b.label).click().run()
+    record = app.session_state.last_metrics
+    assert record["stop_reason"] == "answer" and record["complete"] is False
+    assert record["eval_count"] == 7 and record["prompt_eval_count"] > 0
+    assert record["tokens_per_s"] is not None
+    assert app.session_state.total_tokens == record["eval_count"] + record["prompt_eval_count"]
+
+
+def test_comparison_stops_like_a_single_model_reply(app, ollama_server):
+    ollama_server.words = ["<think>", "hmm", "</think>", "Quantum ", "stateful ", "superposition ", "entanglement ", "and ", "rambling ", "on"]
+    ollama_server.models.append("qwen3:4b")
+    # The model list is cached; start over with a fresh catalog
+    st.cache_resource.clear()
+    app.run()
+    app.multiselect(key="compare_select").set_value(["qwen3:4b"]).run()
+    app.text_area(key="chat_input").set_value("What is a qubit?")
+    next(b for b in app.button if "SEND" in b.label).click().run()
+    assert not app.exception
+    assert app.session_state.messages[-1]["answer"] == "Quantum stateful superposition entanglement"
+    results = app.session_state.last_comparison["results"]
+    assert [r["answer"] for r in results] == ["Quantum stateful superposition entanglement"] * 2
+    assert all(r["record"]["complete"] is False for r in results)
+    assert all(body["options"]["num_predict"] == 2048 for body in ollama_server.posts("/api/chat"))
@@ -0,0 +1,46 @@
+from message import Message, load_messages
+
+THINK = "step one, then step two\n" * 20
+TEXT = f"<think>\n{THINK}\n</think>\n\nFour word jargon answer"
+
+
+def reply(**kwargs):
+    return Message("assistant", TEXT, THINK, "Four word jargon answer", **kwargs)
+
+
+def test_reads_like_the_dict_it_replaced():
+    msg = reply(seq=3)
+    assert msg["answer"] == "Four word jargon answer" and msg.get("think", "") == THINK
+    assert msg["content"] == TEXT and msg["seq"] == 3
+    assert "digest" not in msg and msg.get("digest", "x") == "x"
+    msg["digest"] = "abc"
+    assert "digest" in msg
+    user = Message("user", "hi")
+    assert "think" not in user and user.get("answer", user["content"]) == "hi"
+
+
+def test_think_and_answer_are_offsets_into_the_text():
+    msg = reply()
+    assert isinstance(msg._think, tuple) and isinstance(msg._answer, tuple)
+    # A translated answer isn't a slice of the raw reply
+    translated = Message("assistant", TEXT, THINK, "Quatre mots de jargon")
+    assert translated.answer == "Quatre mots de jargon"
+
+
+def test_compact_keeps_every_field_readable():
+    msg = reply(seq=1)
+    before = msg.to_dict()
+    assert msg.compact()
+    assert msg.compressed and isinstance(msg._answer, str)
+    assert msg.to_dict() == before
+    assert not msg.compact()
+    # Short or think-less messages stay as they are
+    assert not Message("user", "x" * 1000).compact()
+    assert not Message("assistant", "<think>a</think>b", "a", "b").compact()
+
+
+def test_load_messages_keeps_the_newest_raw():
+    rows = [reply(seq=i).to_dict() for i in range(10)]
+    messages = load_messages(rows, keep_raw=3)
+    assert [m.compressed for m in messages] == [True] * 7 + [False] * 3
+    assert [m.to_dict() for m in messages] == rows
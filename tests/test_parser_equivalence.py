@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from streaming import ThinkStreamParser
+
+
+def extract_think_and_answer(text: str):
+    # The original full-text split the streaming parser replaced; kept here
+    # as the reference it must agree with
+    think = ""
+    answer = text
+    if "<think>" in text and "</think>" in text:
+        start = text.index("<think>") + 7
+        end = text.index("</think>")
+        think = text[start:end].strip()
+        answer = text[end + 8:].strip()
+    return think, answer
+
+
+CASES = [
+    "<think>\nreasoning about it\n</think>\n\nQuantum stateful superposition entanglement",
+    "Plain answer without any thinking",
+    "<think>never closed, still thinking",
+    "preamble <think>a</think> answer",
+    "<think>first</think> answer <think>second</think> tail",
+    "<think></think>",
+    "<think>code: if a < b and b > c: return '<thin'</think> Done <",
+    "",
+    "<<think>>x<</think>>y",
+]
+
+
+def split_randomly(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 12)))) if len(text) > 1 else []
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_streaming_parser_matches_full_text_split(text):
+    rng = random.Random(text)
+    for _ in range(200):
+        parser = ThinkStreamParser()
+        for delta in split_randomly(text, rng):
+            parser.feed(delta)
+        assert parser.text == text
+        assert parser.result() == extract_think_and_answer(text)
+
+
+def test_random_texts_match():
+    rng = random.Random(4)
+    pieces = ["<think>", "</think>", "<", "</", "think", ">", "a", " ", "\n", "word "]
+    for _ in range(2000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 14)))
+        # The reference assumes the closing tag follows the opening one
+        if "</think>" in text and "<think>" in text and text.index("</think>") < text.index("<think>"):
+            continue
+        parser = ThinkStreamParser()
+        for delta in split_randomly(text, rng):
+            parser.feed(delta)
+        assert parser.result() == extract_think_and_answer(text), text
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from persona_registry import PersonaRegistry
+
+PERSONA_DIR = Path(__file__).resolve().parent.parent / "personas"
+
+
+def test_names_and_full_aliases_switch():
+    registry = PersonaRegistry(PERSONA_DIR)
+    assert registry.detect("Talk like Iron Man") == "iron man"
+    assert registry.detect("what would tony stark build?") == "iron man"
+    assert registry.detect("Sherlock Holmes, any clues?") == "sherlock"
+    assert registry.detect("be naruto") == "naruto"
+
+
+def test_everyday_words_do_not_switch():
+    registry = PersonaRegistry(PERSONA_DIR)
+    assert registry.detect("Stark contrast between these two options?") is None
+    assert registry.detect("The holmes family lives next door") is None
+    assert registry.detect("ironmanlike") is None
+
+
+def test_new_files_are_picked_up(tmp_path):
+    registry = PersonaRegistry(tmp_path, reload_interval=0)
+    assert registry.detect("hello yoda") is None
+    (tmp_path / "yoda.json").write_text('{"name": "yoda", "prompt": "You are Yoda."}', encoding="utf-8")
+    assert registry.detect("hello yoda") == "yoda"
+    assert registry.prompt("yoda") == "You are Yoda."
+
+
+def test_malformed_files_are_skipped(tmp_path):
+    (tmp_path / "empty.yaml").write_text("", encoding="utf-8")
+    (tmp_path / "list.json").write_text('["not", "a", "persona"]', encoding="utf-8")
+    (tmp_path / "odd.json").write_text('{"name": 42, "prompt": "x"}', encoding="utf-8")
+    (tmp_path / "bad_aliases.json").write_text('{"name": "bob", "aliases": "bobby"}', encoding="utf-8")
+    (tmp_path / "yoda.json").write_text('{"name": "yoda", "prompt": "You are Yoda."}', encoding="utf-8")
+    registry = PersonaRegistry(tmp_path, reload_interval=0)
+    assert list(registry) == ["yoda"]
+    # A half-written file appearing later doesn't break detection
+    (tmp_path / "partial.yaml").write_text("", encoding="utf-8")
+    assert registry.detect("hello yoda") == "yoda"
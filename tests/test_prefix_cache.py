@@ -0,0 +1,44 @@
+import threading
+
+from prefix_cache import PrefixCache
+
+
+def test_concurrent_prefetches_share_one_warm():
+    release = threading.Event()
+    calls = []
+
+    def warm(model, prompt):
+        calls.append((model, prompt))
+        release.wait(2)
+        return [1, 2, 3]
+
+    cache = PrefixCache(warm)
+    futures = [cache.prefetch("gemma3", "You are Naruto.") for _ in range(5)]
+    assert cache.peek("gemma3", "You are Naruto.") is None
+    release.set()
+    assert [f.result() for f in futures] == [[1, 2, 3]] * 5
+    assert calls == [("gemma3", "You are Naruto.")]
+    assert cache.peek("gemma3", "You are Naruto.") == [1, 2, 3]
+    assert cache.prefetch("gemma3", "You are Naruto.") is None
+
+
+def test_model_and_prompt_changes_get_their_own_entries():
+    cache = PrefixCache(lambda model, prompt: [len(model), len(prompt)], max_items=2)
+    cache.prefetch("gemma3", "a").result()
+    cache.prefetch("qwen3", "a").result()
+    cache.peek("gemma3", "a")  # most recently used now
+    cache.prefetch("gemma3", "edited").result()
+    assert cache.peek("qwen3", "a") is None
+    assert cache.peek("gemma3", "a") == [6, 1]
+    assert len(cache) == 2
+
+
+def test_failed_warms_are_not_cached():
+    def warm(model, prompt):
+        raise ConnectionError("node down")
+
+    cache = PrefixCache(warm)
+    assert cache.prefetch("gemma3", "p").result() is None
+    assert cache.peek("gemma3", "p") is None
+    # ...and a later request tries again
+    assert cache.prefetch("gemma3", "p") is not None
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from response_cache import ResponseCache
+
+
+class Producer:
+    # Slow upstream generation that records how often it ran and whether
+    # it was closed before the end
+    def __init__(self, deltas=20, delay=0.01):
+        self.deltas = deltas
+        self.delay = delay
+        self.calls = 0
+        self.closed = False
+        self.emitted = 0
+
+    def __call__(self, final):
+        self.calls += 1
+        try:
+            for i in range(self.deltas):
+                time.sleep(self.delay)
+                self.emitted += 1
+                yield f"w{i} "
+            final["eval_count"] = self.deltas
+        except GeneratorExit:
+            self.closed = True
+            raise
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_hit_replays_the_stored_chunks():
+    cache = ResponseCache()
+    produce = Producer(deltas=3, delay=0)
+    done = {}
+    first = "".join(cache.stream("k", produce, done))
+    assert done == {"eval_count": 3}
+    done = {}
+    assert "".join(cache.stream("k", produce, done)) == first
+    assert done == {"cached": True} and produce.calls == 1
+
+
+def test_concurrent_identical_requests_share_one_generation():
+    cache = ResponseCache()
+    produce = Producer(deltas=5, delay=0.01)
+    results = []
+
+    def ask():
+        results.append("".join(cache.stream("k", produce)))
+
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert produce.calls == 1
+    assert results == ["w0 w1 w2 w3 w4 "] * 8
+
+
+def test_last_subscriber_leaving_stops_the_generation():
+    cache = ResponseCache()
+    produce = Producer(deltas=200, delay=0.01)
+    stream = cache.stream("k", produce)
+    next(stream)
+    next(stream)
+    stream.close()  # e.g. the scheduler cancelled this session's ticket
+    assert wait_for(lambda: produce.closed)
+    assert produce.emitted < 200
+    assert cache.get("k") is None
+    # The next request starts a fresh generation instead of joining the dead one
+    assert "".join(cache.stream("k", Producer(deltas=2, delay=0))) == "w0 w1 "
+
+
+def test_generation_continues_while_someone_is_still_listening():
+    cache = ResponseCache()
+    produce = Producer(deltas=10, delay=0.01)
+    leaving = cache.stream("k", produce)
+    next(leaving)
+    staying = cache.stream("k", produce)
+    next(staying)
+    leaving.close()
+    rest = "".join(staying)
+    assert not produce.closed and produce.calls == 1
+    assert rest.endswith("w9 ")
+    assert cache.get("k") is not None
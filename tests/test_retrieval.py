@@ -0,0 +1,32 @@
+from retrieval import BM25Index, chunk_pages, chunk_text, estimate_tokens
+
+
+def test_chunks_overlap_across_page_boundaries():
+    pages = [" ".join(f"p{p}w{i}" for i in range(30)) for p in range(4)]
+    chunks = list(chunk_pages(iter(pages), chunk_words=50, overlap=10))
+    words = [c.split() for c in chunks]
+    assert all(len(w) == 50 for w in words[:-1])
+    for previous, current in zip(words, words[1:]):
+        assert previous[-10:] == current[:10]
+    assert words[-1][-1] == "p3w29"
+    assert chunk_text("short text") == ["short text"]
+
+
+def test_search_ranks_the_chunk_with_the_rare_terms_first():
+    chunks = ["the cat sat on the mat"] * 5 + ["quantum entanglement of the cat", "the dog barked"]
+    index = BM25Index(chunks)
+    hits = index.search("quantum cat", k=3)
+    assert hits[0][0] == 5
+    assert all(score > 0 for _, score in hits)
+    assert index.search("unicorns") == []
+
+
+def test_select_keeps_the_budget_and_document_order():
+    chunks = [f"section {i} " + "filler " * 100 for i in range(10)]
+    chunks[2] += "alpha beta"
+    chunks[7] += "alpha beta gamma"
+    index = BM25Index(chunks)
+    picked = index.select("alpha beta gamma", k=4, token_budget=estimate_tokens(chunks[7]) * 2)
+    assert picked == [chunks[2], chunks[7]]
+    # Questions that match nothing get the opening chunks
+    assert index.select("summarize", k=2, token_budget=10**6) == chunks[:2]
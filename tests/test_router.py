@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+
+import ollama
+import pytest
+import requests
+
+from fanout import fan_out, iter_events
+from mock_ollama import MockOllama
+from model_catalog import ModelCatalog
+from router import NoHealthyEndpoint, Router
+from streaming import GenerationBudget
+from vector_store import OllamaEmbedder
+
+
+def dead_url():
+    # A port nothing listens on
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def generate(node):
+    response = requests.post(f"{node.url}/api/generate", json={"model": "gemma3", "prompt": "hi", "stream": False}, timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+
+def make_router(urls, **kwargs):
+    kwargs.setdefault("timeout", 0.5)
+    kwargs.setdefault("backoff", 0.01)
+    return Router(urls, **kwargs)
+
+
+def test_call_fails_over_to_a_live_node(ollama_server):
+    router = make_router([dead_url(), ollama_server.url])
+    for _ in range(4):
+        assert router.call("gemma3", generate)["response"] == "Hello there friend."
+    assert len(ollama_server.posts("/api/generate")) == 4
+    states = {url: state for url, state, _, _ in router.status()}
+    assert states[ollama_server.url] == "ok"
+
+
+def test_no_healthy_endpoint_once_every_circuit_is_open():
+    router = make_router([dead_url()], failure_threshold=1, retries=0)
+    with pytest.raises(NoHealthyEndpoint):
+        for _ in range(3):
+            try:
+                router.call("gemma3", generate)
+            except requests.ConnectionError:
+                pass
+
+
+def test_comparison_streams_are_routed_and_counted(ollama_server):
+    router = make_router([dead_url(), ollama_server.url])
+    messages = [{"role": "user", "content": "hi"}]
+    events = fan_out(["gemma3", "qwen3:4b"], messages, router=router)
+    text = {}
+    for model, delta, record in iter_events(events, 2):
+        if record is None:
+            text[model] = text.get(model, "") + delta
+    assert text == {"gemma3": "Hello there friend.", "qwen3:4b": "Hello there friend."}
+    assert len(ollama_server.posts("/api/chat")) == 2
+    # Every reservation was released again
+    assert all(in_flight == 0 for _, _, in_flight, _ in router.status())
+
+
+def test_comparison_reports_an_unreachable_cluster_as_an_error():
+    router = make_router([dead_url()], failure_threshold=1, retries=0)
+    events = fan_out(["gemma3"], [{"role": "user", "content": "hi"}], router=router)
+    deltas = [delta for _, delta, record in iter_events(events, 1) if record is None]
+    assert len(deltas) == 1 and deltas[0].startswith("⚠ Ollama error")
+
+
+def test_client_factory_builds_one_client_per_node(ollama_server):
+    router = make_router([ollama_server.url], client_factory=ollama.Client)
+    reply = router.call("gemma3", lambda node: node.client.chat(model="gemma3", messages=[{"role": "user", "content": "hi"}]))
+    assert reply.message.content == "Hello there friend."
+
+
+def test_cancelled_comparison_closes_its_upstream_streams(ollama_server):
+    ollama_server.words = [f"w{i} " for i in range(200)]
+    ollama_server.delay = 0.01
+    router = make_router([ollama_server.url])
+    cancel = threading.Event()
+    events = fan_out(["gemma3", "qwen3:4b"], [{"role": "user", "content": "hi"}], router=router, cancel=cancel)
+    seen = set()
+    while len(seen) < 2:
+        seen.add(events.get(timeout=5)[0])
+    cancel.set()
+    deadline = time.monotonic() + 5
+    while ollama_server.dropped < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    # Both requests were dropped long before their 200 tokens, and released
+    assert ollama_server.dropped == 2
+    assert all(in_flight == 0 for _, _, in_flight, _ in router.status())
+    assert not any(record for _, _, record in list(events.queue))
+
+
+@pytest.fixture
+def two_nodes():
+    nodes = [MockOllama(models=["gemma3:latest"]), MockOllama(models=["qwen3:4b", "gemma3:latest"])]
+    yield nodes
+    for node in nodes:
+        node.close()
+
+
+def test_catalog_lists_and_warms_models_across_nodes(two_nodes):
+    a, b = two_nodes
+    catalog = ModelCatalog(make_router([a.url, b.url], client_factory=ollama.Client))
+    catalog.warm("qwen3:4b")
+    deadline = time.monotonic() + 5
+    while not b.posts("/api/generate") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The preload lands on the node that has the model, not the first one
+    assert b.posts("/api/generate")[0]["model"] == "qwen3:4b"
+    assert not a.posts("/api/generate")
+    assert [m.name for m in catalog.models()] == ["gemma3:latest", "qwen3:4b"]
+    assert catalog.resident() == {"gemma3:latest", "qwen3:4b"}
+
+
+def test_catalog_skips_an_unreachable_node(ollama_server):
+    catalog = ModelCatalog(make_router([dead_url(), ollama_server.url], client_factory=ollama.Client))
+    assert [m.name for m in catalog.models()] == ["gemma3:latest"]
+
+
+def test_embeddings_go_through_the_router(ollama_server):
+    embed = OllamaEmbedder(make_router([dead_url(), ollama_server.url], client_factory=ollama.Client), batch_size=2)
+    vectors = embed(["a", "bb", "ccc"])
+    assert vectors.tolist() == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    assert [len(r["input"]) for r in ollama_server.posts("/api/embed")] == [2, 1]
+
+
+def test_comparison_applies_the_generation_budget(ollama_server):
+    ollama_server.words = ["<think>", "hmm", "</think>", "Quantum ", "stateful ", "superposition ", "entanglement ", "and ", "rambling ", "on"]
+    ollama_server.delay = 0.01
+    events = fan_out(
+        ["gemma3", "qwen3:4b"], [{"role": "user", "content": "hi"}], router=make_router([ollama_server.url]),
+        options={"num_predict": 64}, budget=lambda: GenerationBudget(4, max_tokens=64),
+    )
+    text, records = {}, {}
+    for model, delta, record in iter_events(events, 2):
+        if record is None:
+            text[model] = text.get(model, "") + delta
+        else:
+            records[model] = record
+    assert set(text.values()) == {"<think>hmm</think>Quantum stateful superposition entanglement"}
+    assert all(r["stop_reason"] == "answer" and not r["complete"] for r in records.values())
+    assert all(body["options"] == {"num_predict": 64} for body in ollama_server.posts("/api/chat"))
@@ -0,0 +1,78 @@
+import threading
+
+import requests
+
+from scheduler import BACKGROUND_SESSION, Scheduler
+
+
+def test_slots_are_capped_and_sessions_take_turns():
+    scheduler = Scheduler(1)
+    a1 = scheduler.submit("a")
+    a2 = scheduler.submit("a", supersede=False)
+    a3 = scheduler.submit("a", supersede=False)
+    b1 = scheduler.submit("b")
+    assert a1.admitted and not (a2.admitted or a3.admitted or b1.admitted)
+    order = []
+    for _ in range(3):
+        running = next(t for t in (a1, a2, a3, b1) if t.admitted and t not in order)
+        order.append(running)
+        scheduler.release(running)
+    # b gets its turn before a's third ticket
+    assert order == [a1, a2, b1]
+    assert a3.admitted
+
+
+def test_new_submission_supersedes_the_sessions_older_tickets():
+    scheduler = Scheduler(1)
+    running = scheduler.submit("a")
+    newer = scheduler.submit("a")
+    assert running.cancelled and not newer.cancelled
+    scheduler.release(running)
+    assert newer.admitted
+
+
+def test_background_work_waits_for_foreground_requests():
+    scheduler = Scheduler(1)
+    user = scheduler.submit("a")
+    warm1 = scheduler.submit(BACKGROUND_SESSION, background=True)
+    warm2 = scheduler.submit(BACKGROUND_SESSION, background=True)
+    other = scheduler.submit("b")
+    # Background tickets don't supersede one another
+    assert not warm1.cancelled and not warm2.cancelled
+    assert scheduler.position(other) == 1 and scheduler.position(warm1) == 2
+    scheduler.release(user)
+    assert other.admitted and not warm1.admitted
+    scheduler.release(other)
+    assert warm1.admitted
+    assert scheduler.status() == (1, 1)
+
+
+def test_load_against_mock_node_never_exceeds_the_limit(ollama_server):
+    scheduler = Scheduler(2)
+    lock = threading.Lock()
+    active, peak, served = [0], [0], []
+
+    def session(i):
+        for _ in range(3):
+            with scheduler.slot(f"s{i}", poll=0.01) as ticket:
+                assert not ticket.cancelled
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                response = requests.post(
+                    f"{ollama_server.url}/api/generate",
+                    json={"model": "gemma3", "prompt": "hi", "stream": False}, timeout=5,
+                )
+                with lock:
+                    active[0] -= 1
+                served.append(response.json()["response"])
+
+    ollama_server.delay = 0.002
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+    assert served == ["Hello there friend."] * 36
+    assert scheduler.status() == (0, 0)
@@ -0,0 +1,54 @@
+from metrics import GenerationMetrics, MetricsSink, truncated_final
+from streaming import GenerationBudget
+
+
+def feed_all(budget, deltas):
+    out = []
+    for delta in deltas:
+        out.append(budget.feed(delta))
+        if budget.stop_reason:
+            break
+    return "".join(out)
+
+
+def test_budget_stops_after_the_fourth_answer_word():
+    budget = GenerationBudget(answer_words=4, max_tokens=2048)
+    deltas = ["<think>", "hmm", "</think>", "Quantum ", "stateful ", "superposition ", "entanglement", " and ", "more"]
+    text = feed_all(budget, deltas)
+    assert text == "<think>hmm</think>Quantum stateful superposition entanglement"
+    stats = budget.stats()
+    assert stats["stop_reason"] == "answer"
+    assert stats["num_predict_headroom"] == 2048 - budget.tokens
+
+
+def test_think_budget():
+    budget = GenerationBudget(answer_words=4, think_tokens=3)
+    feed_all(budget, ["<think>"] + ["x "] * 10)
+    assert budget.stop_reason == "think_budget"
+
+
+def test_headroom_is_not_exported_as_saved_tokens(tmp_path):
+    sink = MetricsSink(tmp_path, "test")
+    for stop_reason in ("answer", None):
+        metrics = GenerationMetrics("test", "gemma3")
+        metrics.token()
+        sink.record(metrics.finish({"eval_count": 12, "stop_reason": stop_reason, "num_predict_headroom": 2036}))
+    prom = (tmp_path / "test.prom").read_text()
+    assert 'ollama_early_stops_total{app="test",model="gemma3",complete="false"} 1' in prom
+    assert "saved" not in prom
+
+
+def test_early_stopped_records_are_estimates_kept_apart(tmp_path):
+    sink = MetricsSink(tmp_path, "test")
+    ollama_final = {"eval_count": 40, "prompt_eval_count": 100, "eval_duration": 2 * 10**9,
+                    "prompt_eval_duration": 10**8, "load_duration": 10**7, "total_duration": 3 * 10**9}
+    complete = GenerationMetrics("test", "gemma3").finish(ollama_final)
+    partial = GenerationMetrics("test", "gemma3").finish({**truncated_final(90, 12, 0.5), "stop_reason": "answer"})
+    assert complete["complete"] and not partial["complete"]
+    assert partial["prompt_eval_count"] == 90 and partial["tokens_per_s"] == 24.0
+    assert partial["prompt_eval_s"] is None and partial["load_s"] is None
+    sink.record(complete)
+    sink.record(partial)
+    prom = (tmp_path / "test.prom").read_text()
+    assert 'ollama_prompt_eval_tokens_total{app="test",model="gemma3",complete="true"} 100' in prom
+    assert 'ollama_prompt_eval_tokens_total{app="test",model="gemma3",complete="false"} 90' in prom
@@ -0,0 +1,45 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from translation import GoogleBackend, StreamingTranslator, TranslationCache, Translator
+
+
+class SharedStateTranslator:
+    # Behaves like deep_translator's GoogleTranslator: the text is stored on
+    # the instance before the (slow) request and read back afterwards
+    instances = 0
+    lock = threading.Lock()
+
+    def __init__(self, source, target):
+        with self.lock:
+            SharedStateTranslator.instances += 1
+        self.params = {}
+
+    def translate(self, text):
+        self.params["q"] = text
+        time.sleep(0.005)
+        return f"<{self.params['q']}>"
+
+
+def test_concurrent_translations_keep_their_own_text():
+    backend = GoogleBackend(client_factory=SharedStateTranslator)
+    translator = Translator(backend, TranslationCache())
+    sentences = [f"Sentence number {i} is here." for i in range(40)]
+    with ThreadPoolExecutor(4) as pool:
+        stream = StreamingTranslator(translator, "fr", pool)
+        for sentence in sentences:
+            stream.feed(sentence + " ")
+        result = stream.finish()
+    assert result == " ".join(f"<{s}>" for s in sentences)
+    # Every cached entry belongs to its own sentence
+    for s in sentences:
+        assert translator.translate(s, "fr") == f"<{s}>"
+
+
+def test_clients_are_reused_per_thread():
+    SharedStateTranslator.instances = 0
+    backend = GoogleBackend(client_factory=SharedStateTranslator)
+    for i in range(5):
+        backend.translate(f"text {i}", "auto", "fr")
+    assert SharedStateTranslator.instances == 1
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from tts import TTSWorker
+
+
+class FakeEngine:
+    # pyttsx3's surface; runAndWait blocks while `gate` is clear
+    def __init__(self):
+        self.spoken = []
+        self.busy = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+        self._pending = None
+
+    def setProperty(self, name, value):
+        pass
+
+    def save_to_file(self, text, path):
+        self._pending = (text, path)
+
+    def runAndWait(self):
+        text, path = self._pending
+        self.busy.set()
+        self.gate.wait(5)
+        self.spoken.append(text)
+        with open(path, "wb") as f:
+            f.write(text.encode())
+
+
+@pytest.fixture
+def engine():
+    return FakeEngine()
+
+
+def wait_for(worker, key):
+    deadline = time.monotonic() + 5
+    while worker.result(key) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return worker.result(key)
+
+
+def hold(engine, worker, text, channel):
+    # Keeps the worker busy on `text` until engine.gate is set
+    engine.gate.clear()
+    worker.submit(text, channel)
+    assert engine.busy.wait(5)
+
+
+def test_cached_audio_is_not_synthesized_again(engine, tmp_path):
+    worker = TTSWorker(lambda: engine, tmp_path)
+    key = worker.submit("hello", "a")
+    assert wait_for(worker, key)
+    assert worker.submit("hello", "b") == key
+    # A fresh worker over the same cache finds the file too
+    assert TTSWorker(lambda: engine, tmp_path).result(key)
+    time.sleep(0.05)
+    assert engine.spoken == ["hello"]
+
+
+def test_only_the_newest_job_per_channel_is_spoken(engine, tmp_path):
+    worker = TTSWorker(lambda: engine, tmp_path)
+    hold(engine, worker, "first", "a")
+    stale = worker.submit("second", "a")
+    other = worker.submit("other channel", "b")
+    newest = worker.submit("third", "a")
+    engine.gate.set()
+    assert wait_for(worker, newest) and wait_for(worker, other)
+    assert worker.result(stale) is None
+    assert engine.spoken == ["first", "other channel", "third"]
+
+
+def test_a_full_queue_drops_its_oldest_job(engine, tmp_path):
+    worker = TTSWorker(lambda: engine, tmp_path, max_queue=2)
+    hold(engine, worker, "busy", "a")
+    dropped = worker.submit("b", "b")
+    worker.submit("c", "c")
+    newest = worker.submit("d", "d")
+    engine.gate.set()
+    assert wait_for(worker, newest)
+    assert worker.result(dropped) is None
+    assert engine.spoken == ["busy", "c", "d"]
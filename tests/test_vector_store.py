@@ -0,0 +1,88 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from vector_store import VectorStore
+
+
+class HashEmbedder:
+    # Bag of hashed words: deterministic, and a text scores 1.0 against itself
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+        return vectors
+
+
+def chunks(doc: str, n: int):
+    return [f"{doc} section{i} topic{i * 7 % 5} note{i}" for i in range(n)]
+
+
+def fill(store):
+    for doc, n in (("apollo", 4), ("gemini", 3), ("mercury", 5)):
+        store.add(f"d-{doc}", f"{doc}.pdf", chunks(doc, n))
+
+
+@pytest.mark.parametrize("block_rows", [1, 3, 5, 65536])
+def test_top_k_is_the_same_whatever_the_block_size(tmp_path, block_rows):
+    reference = VectorStore(tmp_path / "ref", HashEmbedder())
+    store = VectorStore(tmp_path / "blocks", HashEmbedder(), block_rows=block_rows)
+    fill(reference)
+    fill(store)
+    for doc, i in (("apollo", 0), ("gemini", 2), ("mercury", 4)):
+        query = chunks(doc, 5)[i]
+        hits = store.search(query, k=3)
+        assert hits[0][:2] == (f"d-{doc}", i) and hits[0][2] == pytest.approx(1.0)
+        assert [h[2] for h in hits] == sorted((h[2] for h in hits), reverse=True)
+        assert [h[:2] for h in hits] == [h[:2] for h in reference.search(query, k=3)]
+    # k larger than the library returns every row
+    assert len(store.search("apollo", k=50)) == 12
+
+
+def test_readding_a_document_is_a_noop(tmp_path):
+    embed = HashEmbedder()
+    store = VectorStore(tmp_path, embed)
+    assert store.add("d-apollo", "apollo.pdf", chunks("apollo", 4))
+    size = (tmp_path / "vectors.f32").stat().st_size
+    assert not store.add("d-apollo", "apollo-copy.pdf", chunks("apollo", 4))
+    assert not store.add("d-empty", "empty.pdf", [])
+    assert embed.calls == 1
+    assert (tmp_path / "vectors.f32").stat().st_size == size
+    assert [d["name"] for d in store.documents()] == ["apollo.pdf"]
+
+
+def test_library_reopens_from_its_index(tmp_path):
+    store = VectorStore(tmp_path, HashEmbedder())
+    fill(store)
+    query = chunks("gemini", 3)[1]
+    reopened = VectorStore(tmp_path, HashEmbedder())
+    assert len(reopened) == 3 and "d-gemini" in reopened
+    assert reopened.documents() == store.documents()
+    assert reopened.search(query, k=2) == store.search(query, k=2)
+    assert reopened.select(query, k=1) == [f"[gemini.pdf]\n{query}"]
+
+
+def test_a_partial_row_is_padded_and_never_returned(tmp_path):
+    store = VectorStore(tmp_path, HashEmbedder())
+    store.add("d-apollo", "apollo.pdf", chunks("apollo", 2))
+    # An interrupted write left half a row behind
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\1" * 100)
+    store.add("d-gemini", "gemini.pdf", chunks("gemini", 2))
+    assert [d["offset"] for d in store.documents()] == [0, 3]
+    assert (tmp_path / "vectors.f32").stat().st_size == 5 * 4 * 64
+    assert store._locate(1) == ("d-apollo", 1)
+    assert store._locate(2) is None
+    assert store._locate(4) == ("d-gemini", 1)
+    assert store._locate(5) is None
+    hits = store.search(chunks("gemini", 2)[1], k=5)
+    assert hits[0][:2] == ("d-gemini", 1)
+    assert all(h[:2] != ("d-apollo", 2) for h in hits) and len(hits) == 4
+    assert store.chunk("d-gemini", 1) == chunks("gemini", 2)[1]
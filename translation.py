@@ -0,0 +1,193 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+
+# Unicode blocks for languages with their own script
+_SCRIPTS = {
+    "ta": [(0x0B80, 0x0BFF)],
+    "hi": [(0x0900, 0x097F)],
+    "ar": [(0x0600, 0x06FF), (0x0750, 0x077F)],
+    "ru": [(0x0400, 0x04FF)],
+    "ko": [(0xAC00, 0xD7AF), (0x1100, 0x11FF)],
+    "ja": [(0x3040, 0x30FF), (0x4E00, 0x9FFF)],
+    "zh-CN": [(0x4E00, 0x9FFF)],
+}
+
+# A few very frequent words per Latin-script language
+_STOPWORDS = {
+    "en": {"the", "and", "is", "are", "of", "to", "in", "it", "you", "what", "how", "this", "that", "with", "for"},
+    "es": {"el", "la", "los", "las", "y", "es", "de", "que", "en", "un", "una", "por", "para", "con", "qué"},
+    "fr": {"le", "la", "les", "et", "est", "de", "des", "que", "un", "une", "pour", "avec", "dans", "je", "vous"},
+    "de": {"der", "die", "das", "und", "ist", "nicht", "ein", "eine", "zu", "mit", "ich", "sie", "wie", "was", "für"},
+    "pt": {"o", "a", "os", "as", "e", "é", "de", "que", "um", "uma", "para", "com", "não", "em", "do"},
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?;。！？；])\s+|\n+")
+
+
+def looks_like(text: str, lang: str) -> bool:
+    # Cheap local language-ID: script share for non-Latin languages, a
+    # stopword vote for Latin ones. Unsure means "translate it".
+    letters = [c for c in text if c.isalpha()]
+    if not letters:
+        return True
+    if lang in _SCRIPTS:
+        hits = sum(any(lo <= ord(c) <= hi for lo, hi in _SCRIPTS[lang]) for c in letters)
+        return hits / len(letters) >= 0.6
+    if lang not in _STOPWORDS or sum(ord(c) < 0x250 for c in letters) / len(letters) < 0.9:
+        return False
+    words = _WORD_RE.findall(text.lower())
+    votes = {code: sum(w in stop for w in words) for code, stop in _STOPWORDS.items()}
+    return votes[lang] > 0 and votes[lang] == max(votes.values())
+
+
+def _google_translator(source: str, target: str):
+    from deep_translator import GoogleTranslator
+    return GoogleTranslator(source=source, target=target)
+
+
+# GoogleTranslator keeps the text of the request in progress on the
+# instance, so one instance can't serve two threads at once; each thread
+# gets its own client per (source, target).
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, client_factory=None):
+        self.client_factory = client_factory or _google_translator
+        self._local = threading.local()
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        clients = self._local.__dict__.setdefault("clients", {})
+        key = (source, target)
+        if key not in clients:
+            clients[key] = self.client_factory(source, target)
+        return clients[key].translate(text)
+
+
+# (source, target, sha256(text)) -> translation, with an in-memory LRU in
+# front of an optional SQLite table so repeats skip the network entirely.
+class TranslationCache:
+    def __init__(self, path=None, max_items: int = 2048):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "backend TEXT, source TEXT, target TEXT, digest TEXT, text TEXT, "
+                "PRIMARY KEY (backend, source, target, digest))"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT text FROM translations WHERE backend=? AND source=? AND target=? AND digest=?", key
+            ).fetchone()
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def put(self, key, text: str):
+        self._remember(key, text)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)", (*key, text))
+                self._db.commit()
+
+    def _remember(self, key, text: str):
+        with self._lock:
+            self._items[key] = text
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+class Translator:
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or GoogleBackend()
+        self.cache = cache or TranslationCache()
+
+    def translate(self, text: str, target: str, source: str = "auto") -> str:
+        if not text.strip() or looks_like(text, target):
+            return text
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        key = (self.backend.name, source, target, digest)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            translated = self.backend.translate(text, source, target)
+        except Exception:
+            return text
+        if translated:
+            self.cache.put(key, translated)
+        return translated or text
+
+
+# Translates an answer while it is still streaming: each finished sentence
+# goes to the thread pool straight away, and results are handed back in
+# order, so translation overlaps generation instead of following it.
+class StreamingTranslator:
+    def __init__(self, translator, target: str, pool):
+        self.translator = translator
+        self.target = target
+        self.pool = pool
+        self.fed = False
+        self._buf = ""
+        self._scan_from = 0
+        self._pending = deque()
+        self._done = []
+
+    def feed(self, text: str):
+        if not text:
+            return
+        self.fed = True
+        self._buf += text
+        end = None
+        # Only the new text can hold a boundary we haven't seen yet
+        for m in _SENTENCE_END.finditer(self._buf, max(self._scan_from - 1, 0)):
+            end = m.end()
+        self._scan_from = len(self._buf)
+        if end is not None:
+            self._submit(self._buf[:end])
+            self._buf = self._buf[end:]
+            self._scan_from = len(self._buf)
+
+    def _submit(self, text: str):
+        for sentence in _SENTENCE_END.split(text):
+            if sentence.strip():
+                self._pending.append(self.pool.submit(self.translator.translate, sentence, self.target))
+
+    def ready(self) -> str:
+        while self._pending and self._pending[0].done():
+            self._done.append(self._pending.popleft().result())
+        return " ".join(self._done)
+
+    def preview(self) -> str:
+        # Translated sentences so far, with an ellipsis while more are in flight
+        ready = self.ready()
+        if self._pending or self._buf.strip():
+            return f"{ready} …".strip()
+        return ready
+
+    def finish(self) -> str:
+        self._submit(self._buf)
+        self._buf = ""
+        while self._pending:
+            self._done.append(self._pending.popleft().result())
+        return " ".join(self._done)
@@ -0,0 +1,70 @@
+import hashlib
+import os
+import queue
+import threading
+from pathlib import Path
+
+
+# Owns one long-lived speech engine on a background thread and renders
+# answers to audio files cached by (text, voice, rate). Each channel (one
+# per chat session) only cares about its newest request; older queued
+# jobs for that channel are skipped instead of synthesized.
+class TTSWorker:
+    def __init__(self, engine_factory, cache_dir, voice=None, rate: int = 165, max_queue: int = 8):
+        self.engine_factory = engine_factory
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.voice = voice
+        self.rate = rate
+        self._queue = queue.Queue(max_queue)
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+        self._thread.start()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.voice}|{self.rate}|{text}".encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.wav"
+
+    def submit(self, text: str, channel=None) -> str:
+        key = self.key(text)
+        with self._lock:
+            self._latest[channel] = key
+            if self.path(key).exists():
+                return key
+            while True:
+                try:
+                    self._queue.put_nowait((channel, key, text))
+                    break
+                except queue.Full:
+                    # Bounded backlog: the oldest job gives way to the newest
+                    try:
+                        self._queue.get_nowait()
+                    except queue.Empty:
+                        pass
+        return key
+
+    def result(self, key: str):
+        path = self.path(key)
+        return str(path) if path.exists() else None
+
+    def _run(self):
+        engine = self.engine_factory()
+        engine.setProperty("rate", self.rate)
+        if self.voice:
+            engine.setProperty("voice", self.voice)
+        while True:
+            channel, key, text = self._queue.get()
+            with self._lock:
+                stale = self._latest.get(channel) != key
+            if stale or self.path(key).exists():
+                continue
+            tmp = self.cache_dir / f"{key}.{os.getpid()}.tmp.wav"
+            try:
+                engine.save_to_file(text, str(tmp))
+                engine.runAndWait()
+                os.replace(tmp, self.path(key))
+            except Exception:
+                tmp.unlink(missing_ok=True)
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from retrieval import estimate_tokens
+
+
+class OllamaEmbedder:
+    def __init__(self, router, model: str = "nomic-embed-text", batch_size: int = 32):
+        self.router = router
+        self.model = model
+        self.batch_size = batch_size
+
+    def __call__(self, texts):
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            vectors.extend(self.router.call(self.model, lambda ep: ep.client.embed(model=self.model, input=batch)).embeddings)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# Append-only library of chunk embeddings. Unit-length float32 vectors live
+# in one raw file that is memory-mapped for search; index.jsonl records each
+# document's row offset, and chunk texts sit in per-document JSON files.
+class VectorStore:
+    def __init__(self, root, embed, block_rows: int = 65536):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / "chunks").mkdir(exist_ok=True)
+        self.embed = embed
+        self.block_rows = block_rows
+        self._vectors = self.root / "vectors.f32"
+        self._index = self.root / "index.jsonl"
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._dim = None
+        self._mmap = None
+        if self._index.exists():
+            with open(self._index, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        doc = json.loads(line)
+                        self._docs[doc["digest"]] = doc
+                        self._dim = doc["dim"]
+        self._refresh_offsets()
+
+    def __contains__(self, digest):
+        return digest in self._docs
+
+    def __len__(self):
+        return len(self._docs)
+
+    def documents(self):
+        return list(self._docs.values())
+
+    def _refresh_offsets(self):
+        docs = sorted(self._docs.values(), key=lambda d: d["offset"])
+        self._starts = np.asarray([d["offset"] for d in docs], dtype=np.int64)
+        self._order = [d["digest"] for d in docs]
+
+    def add(self, digest: str, name: str, chunks) -> bool:
+        # Re-adding a document that is already indexed is a no-op
+        if digest in self._docs or not chunks:
+            return False
+        vectors = _normalize(self.embed(list(chunks)))
+        with self._lock:
+            if digest in self._docs:
+                return False
+            dim = vectors.shape[1]
+            if self._dim not in (None, dim):
+                raise ValueError(f"embedding size {dim} does not match library ({self._dim})")
+            with open(self.root / "chunks" / f"{digest}.json", "w", encoding="utf-8") as f:
+                json.dump(list(chunks), f)
+            with open(self._vectors, "ab") as f:
+                # Pad past any partial row left by an interrupted write
+                f.write(b"\0" * (-f.tell() % (4 * dim)))
+                offset = f.tell() // (4 * dim)
+                vectors.tofile(f)
+            doc = {"digest": digest, "name": name, "offset": offset, "count": len(vectors), "dim": dim}
+            with open(self._index, "a", encoding="utf-8") as f:
+                f.write(json.dumps(doc) + "\n")
+            self._docs[digest] = doc
+            self._dim = dim
+            self._mmap = None
+            self._refresh_offsets()
+        return True
+
+    def _matrix(self):
+        if self._mmap is None and self._docs:
+            rows = os.path.getsize(self._vectors) // (4 * self._dim)
+            self._mmap = np.memmap(self._vectors, dtype=np.float32, mode="r", shape=(rows, self._dim))
+        return self._mmap
+
+    def _locate(self, row: int):
+        pos = int(np.searchsorted(self._starts, row, side="right")) - 1
+        if pos < 0:
+            return None
+        doc = self._docs[self._order[pos]]
+        if row >= doc["offset"] + doc["count"]:
+            return None
+        return doc["digest"], row - doc["offset"]
+
+    def search(self, query: str, k: int = 4):
+        matrix = self._matrix()
+        if matrix is None:
+            return []
+        q = _normalize(self.embed([query]))[0]
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        # Scan in blocks so only one slice of the map is resident at a time
+        for start in range(0, len(matrix), self.block_rows):
+            scores = matrix[start:start + self.block_rows] @ q
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            keep = np.argsort(-best_scores)[:k]
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+        hits = []
+        for row, score in zip(best_rows, best_scores):
+            loc = self._locate(int(row))
+            if loc:
+                hits.append((loc[0], loc[1], float(score)))
+        return hits
+
+    def chunk(self, digest: str, i: int) -> str:
+        return _load_chunks(str(self.root / "chunks" / f"{digest}.json"))[i]
+
+    def select(self, query: str, k: int = 4, token_budget: int = 1200):
+        picked = []
+        used = 0
+        for digest, i, _ in self.search(query, k):
+            text = self.chunk(digest, i)
+            cost = estimate_tokens(text)
+            if used + cost > token_budget:
+                continue
+            picked.append(f"[{self._docs[digest]['name']}]\n{text}")
+            used += cost
+        return picked
+
+
+@lru_cache(maxsize=32)
+def _load_chunks(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)